@@ -0,0 +1,223 @@
+# Name:     ATP overview parser
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Pluggable parser backends that turn an ATP player overview page into the infolist dictionary
+
+# Each step describes one element searched with BeautifulSoup's findNext semantics:
+# (name, tag, class, anchor, value) - the first matching element after the element of step "anchor" is taken,
+# value is "text" for the first text node, an attribute name for attributes or None for pure positions
+atp_steps = [
+    ("start", "div", "first-name", None, "text"),
+    ("lastname", "div", "last-name", "start", "text"),
+    ("countrycode", "div", "player-flag-code", "start", "text"),
+    ("website", "a", "official-website-link external", "start", "href"),
+    ("birthday", "span", "table-birthday", "start", "text"),
+    ("turnedpro", "div", "table-big-value", "birthday", "text"),
+    ("weight", "span", "table-weight-kg-wrapper", "birthday", "text"),
+    ("height", "span", "table-height-cm-wrapper", "birthday", "text"),
+    ("row", "tr", None, "birthday", None),
+    ("birthplace", "div", "table-value", "row", "text"),
+    ("residence", "div", "table-value", "birthplace", "text"),
+    ("plays", "div", "table-value", "residence", "text"),
+    ("coach", "div", "table-value", "plays", "text"),
+    ("updated", "h2", "module-title", "coach", "text"),
+    ("year", "td", "overview-year", "updated", None),
+    ("ranking", "div", "stat-value", "year", "data"),
+    ("careerrow", "tr", None, "ranking", None),
+    ("highranking", "div", "stat-value", "careerrow", "data"),
+    ("highrankingdate", "div", "label-value", "highranking", "label"),
+    ("record", "div", "stat-value", "highrankingdate", "data"),
+    ("titles", "div", "stat-value", "record", "data"),
+    ("prizemoney", "div", "stat-value", "titles", "data"),
+]
+
+# Steps that may be missing on a page
+atp_optional = {"website"}
+
+
+def classMatches(value, wanted):
+    # Function that mirrors BeautifulSoup class matching: whole attribute value or one of its classes
+    if wanted is None:
+        return True
+    if value is None:
+        return False
+    return value == wanted or (" " not in wanted and wanted in value.split())
+
+
+def buildInfolist(raw):
+    # Function that turns the raw values of atp_steps into the infolist returned by Playerinfo.scrapeATPInfo
+    # raw       = dictionary {step name: text or attribute dictionary}
+    plays = raw["plays"].split(",")
+    singlesranking = raw["ranking"]["data-singles"].strip()
+    if singlesranking == "0":
+        singlesranking = ""
+    doublesranking = raw["ranking"]["data-doubles"].strip()
+    if doublesranking == "0":
+        doublesranking = ""
+    return {"firstname": raw["start"].strip(), "lastname": raw["lastname"].strip(),
+            "countrycode": raw["countrycode"].strip(), "website": (raw.get("website") or "").strip(),
+            "birthday": raw["birthday"].strip().replace(".", "-")[1:-1], "turnedpro": raw["turnedpro"].strip(),
+            "weight": raw["weight"].strip()[1:-3], "height": raw["height"].strip()[1:-3],
+            "birthplace": raw["birthplace"].strip(), "residence": raw["residence"].strip(),
+            "playhand": plays[0].strip(), "backhand": plays[1].strip(), "coach": raw["coach"].strip().split(", "),
+            "updated": raw["updated"].strip().replace(".", "-")[-10:], "singlesranking": singlesranking,
+            "doublesranking": doublesranking, "highsinglesranking": raw["highranking"]["data-singles"].strip(),
+            "highdoublesranking": raw["highranking"]["data-doubles"].strip(),
+            "highsinglesrankingdate": raw["highrankingdate"]["data-singles-label"].strip().replace(".", "-")[-10:],
+            "highdoublesrankingdate": raw["highrankingdate"]["data-doubles-label"].strip().replace(".", "-")[-10:],
+            "singlesrecord": raw["record"]["data-singles"].strip(), "doublesrecord": raw["record"]["data-doubles"].strip(),
+            "singlestitles": raw["titles"]["data-singles"].strip(), "doublestitles": raw["titles"]["data-doubles"].strip(),
+            "prizemoney": int(raw["prizemoney"]["data-singles"][1:].strip().replace(",", ""))}
+
+
+def rawValue(value, attrs, text):
+    # Function that selects the raw value of a step from the attributes or the first text node of an element
+    if value == "text":
+        return text
+    if value == "href":
+        return attrs.get("href")
+    if value == "data":
+        return {"data-singles": attrs["data-singles"], "data-doubles": attrs["data-doubles"]}
+    if value == "label":
+        return {"data-singles-label": attrs["data-singles-label"], "data-doubles-label": attrs["data-doubles-label"]}
+    return None
+
+
+class Soupbackend(object):
+    # Object that parses the full page with BeautifulSoup and html.parser, used as fallback
+    # Public methods: parse
+
+    name = "html.parser"
+
+    def parse(self, html):
+        # Method that returns the infolist of an ATP overview page
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "html.parser")
+        found = {}
+        raw = {}
+        for name, tag, cls, anchor, value in atp_steps:
+            if anchor is None:
+                element = soup.find(tag, {"class": cls})
+            else:
+                element = found[anchor].findNext(tag, {"class": cls} if cls else {})
+            if element is None:
+                if name in atp_optional:
+                    continue
+                raise ValueError("ATP overview page without " + name)
+            found[name] = element
+            text = element.contents[0] if value == "text" else None
+            raw[name] = rawValue(value, element.attrs, text)
+        return buildInfolist(raw)
+
+
+class Lxmlbackend(object):
+    # Object that feeds only the profile and stats region into an lxml pull parser and stops once all steps are found
+    # Public methods: parse
+
+    name = "lxml"
+
+    def __init__(self, chunksize=16384):
+        # Self method
+        # chunksize = number of characters fed to the parser before checking whether all steps are found
+        self.__chunksize = chunksize
+
+    def parse(self, html):
+        # Method that returns the infolist of an ATP overview page
+        from lxml import etree
+        if isinstance(html, bytes):
+            begin = html.find(b'first-name')
+            begin = html.rfind(b'<', 0, begin) if begin > 0 else 0
+            html = html[begin:].decode("utf-8", errors="replace")
+        else:
+            begin = html.find('first-name')
+            html = html[html.rfind('<', 0, begin):] if begin > 0 else html
+        parser = etree.HTMLPullParser(events=("start", "end"))
+        resolved = {}
+        pending = {}
+        raw = {}
+        index = 0
+        required = len([step for step in atp_steps if step[0] not in atp_optional])
+        done = 0
+        for position in range(0, len(html), self.__chunksize):
+            parser.feed(html[position:position + self.__chunksize])
+            for event, element in parser.read_events():
+                if not isinstance(element.tag, str):
+                    continue
+                if event == "end":
+                    for name in pending.pop(element, ()):
+                        raw[name] = element.text
+                        done += name not in atp_optional
+                    continue
+                index += 1
+                matches = []
+                for name, tag, cls, anchor, value in atp_steps:
+                    if name in resolved or element.tag != tag or (anchor is not None and anchor not in resolved):
+                        continue
+                    if anchor is not None and resolved[anchor] >= index:
+                        continue
+                    if classMatches(element.get("class"), cls):
+                        matches.append((name, value))
+                for name, value in matches:
+                    resolved[name] = index
+                    if value == "text":
+                        pending.setdefault(element, []).append(name)
+                    else:
+                        raw[name] = rawValue(value, element.attrib, None)
+                        done += name not in atp_optional
+            if done == required and not pending:
+                break
+        missing = [step[0] for step in atp_steps if step[0] not in raw and step[0] not in atp_optional]
+        if missing:
+            raise ValueError("ATP overview page without " + ", ".join(missing))
+        return buildInfolist(raw)
+
+
+class Fallbackbackend(object):
+    # Object that parses with lxml and parses the page again with html.parser if lxml fails on it
+    # Public methods: parse
+
+    name = "lxml"
+
+    def __init__(self):
+        # Self method
+        self.__lxml = Lxmlbackend()
+        self.__soup = Soupbackend()
+
+    def parse(self, html):
+        # Method that returns the infolist of an ATP overview page
+        try:
+            return self.__lxml.parse(html)
+        except Exception as e:
+            # e.g. the region fed to lxml starts inside a script, the full page parse does not depend on it
+            from Classes.metrics import metrics
+            metrics.error("parse_lxml", e)
+            return self.__soup.parse(html)
+
+
+def getBackend(name=None):
+    # Function that returns the parser backend by name, defaults to lxml with html.parser as fallback if lxml is
+    # installed and html.parser otherwise
+    # name      = includes lxml (without fallback), html.parser
+    if name in (None, "lxml"):
+        try:
+            import lxml.etree
+            return Fallbackbackend() if name is None else Lxmlbackend()
+        except ImportError:
+            if name == "lxml":
+                raise
+    return Soupbackend()
+
+
+# Testing environment: compares all backends on saved pages, e.g. python -m Classes.atpparser page.html
+if __name__ == '__main__':
+    import sys
+    import time
+    for path in sys.argv[1:]:
+        with open(path, "rb") as page_file:
+            html = page_file.read()
+        results = {}
+        for backend in (Soupbackend(), Lxmlbackend()):
+            start = time.perf_counter()
+            results[backend.name] = backend.parse(html)
+            print(path + " - " + backend.name + " - " + str(round((time.perf_counter() - start) * 1000, 2)) + " ms")
+        print(path + " - identical: " + str(results["lxml"] == results["html.parser"]))
@@ -0,0 +1,254 @@
+# Name:     Fetch engine
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Fetches the profiles of a player on all tennis websites in parallel and merges them into one infolist
+
+# External imports
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Internal imports
+from Classes.atpparser import getBackend
+from Classes.httpsession import sessionpool
+from Classes.infocache import infocache
+from Classes.metrics import metrics
+from Classes.sources import atp_url, itf_url, sparql_url, wta_url
+
+# Profiles of a player on the other websites, linked by the Wikidata item with the ID of one website
+query_profiles = """SELECT ?atp ?wta ?itf
+    WHERE {
+    ?player wdt:%s "%s".
+    OPTIONAL { ?player wdt:P536 ?atp. }
+    OPTIONAL { ?player wdt:P597 ?wta. }
+    OPTIONAL { ?player wdt:P599 ?itf. }
+    }
+    LIMIT 1"""
+
+# Order in which sources fill values missing in the profile of the requested organisation
+merge_order = ["atp", "wta", "itf"]
+
+# Keys of the infolist the JSON-LD profiles can supply, the linked profiles are only fetched if one of them is missing
+linked_fields = ["firstname", "lastname", "birthday", "countrycode", "birthplace", "height", "weight"]
+
+
+class Atpextractor(object):
+    # Object that reads the full infolist from the ATP player overview page
+    # Public methods: profileURL, extract
+
+    org = "atp"
+
+    def __init__(self, parser=None):
+        # Self method
+        # parser    = HTML parser backend, includes lxml, html.parser
+        self.__parser = parser
+
+    def profileURL(self, playerid):
+        # Method that returns the url of the profile page of a player
+        return atp_url + "/en/players/-/" + playerid + "/overview"
+
+    def extract(self, html):
+        # Method that returns the infolist of a profile page
+        return getBackend(self.__parser).parse(html)
+
+
+class Jsonldextractor(object):
+    # Object that reads the personal data of a player from the schema.org Person on a profile page,
+    # used for websites without a dedicated parser
+    # Public methods: profileURL, extract
+
+    def __init__(self, org, url):
+        # Self method
+        # org       = abbreviation of the website, e.g. wta, itf
+        # url       = url of the profile page with {playerid} as placeholder
+        self.org = org
+        self.__url = url
+
+    def profileURL(self, playerid):
+        # Method that returns the url of the profile page of a player
+        return self.__url.format(playerid=playerid)
+
+    def extract(self, html):
+        # Method that returns the part of the infolist found in the JSON-LD of a profile page
+        if isinstance(html, bytes):
+            html = html.decode("utf-8", errors="replace")
+        for block in re.findall(r'<script[^>]*application/ld\+json[^>]*>(.*?)</script>', html, re.S | re.I):
+            try:
+                data = json.loads(block)
+            except ValueError:
+                continue
+            person = findPerson(data)
+            if person is not None:
+                return personInfolist(person)
+        return {}
+
+
+class Fetchengine(object):
+    # Object that runs the extractors of all organisations on one thread pool with a concurrency limit per host
+    # Public methods: getExtractors, fetch, getProfiles, getInfolist
+
+    def __init__(self, workers=16, perhost=4, parser=None):
+        # Self method
+        # workers   = number of pages fetched at the same time
+        # perhost   = number of pages fetched at the same time from one host
+        # parser    = HTML parser backend of the ATP extractor
+        self.__executor = ThreadPoolExecutor(max_workers=workers)
+        self.__perhost = perhost
+        self.__hosts = {}
+        self.__lock = threading.Lock()
+        self.__extractors = {"atp": Atpextractor(parser),
+                             "wta": Jsonldextractor("wta", wta_url + "/players/{playerid}/-"),
+                             "itf": Jsonldextractor("itf", itf_url + "/procircuit/players/player/"
+                                                           "profile.aspx?playerid={playerid}")}
+
+    def getExtractors(self):
+        # Method that returns the extractors by organisation
+        return self.__extractors
+
+    def fetch(self, org, playerid):
+        # Method that fetches and extracts the profile of a player on one website
+        extractor = self.__extractors[org]
+        url = extractor.profileURL(playerid)
+        host = urlparse(url).netloc
+        with self.__lock:
+            limit = self.__hosts.setdefault(host, threading.BoundedSemaphore(self.__perhost))
+        with limit:
+            with metrics.timer("fetch"):
+                response = sessionpool.get(url)
+                response.raise_for_status()
+        with metrics.timer("parse"):
+            return extractor.extract(response.content)
+
+    def getProfiles(self, org, playerid):
+        # Method that returns the IDs {org: playerid} of all profiles linked to a player on Wikidata
+        from SPARQLWrapper import SPARQLWrapper, JSON
+        from Classes.wikidatabulk import wdproperties
+        key = ("profiles", org, playerid, "")
+        profiles = infocache.get(key)
+        if profiles is not None:
+            return profiles
+        sparql = SPARQLWrapper(sparql_url,
+                               agent='wikitennisbot/0.1 (https://wikitennisbot.toolforge.org)')
+        sparql.setMethod('POST')
+        sparql.setQuery(query_profiles % (wdproperties[org], playerid.replace('"', '')))
+        sparql.setReturnFormat(JSON)
+        with metrics.timer("sparql"):
+            bindings = sparql.query().convert()["results"]["bindings"]
+        profiles = {org: playerid}
+        for binding in bindings[:1]:
+            for other, value in binding.items():
+                if other in self.__extractors and other != org:
+                    profiles[other] = value["value"].upper()
+        infocache.set(key, profiles)
+        return profiles
+
+    def getInfolist(self, org, playerid, linked=True, profiles=None):
+        # Method that returns the infolist of a player, values missing in the requested profile are filled from the
+        # profiles on the other linked websites, which are then fetched in parallel
+        # linked    = fill missing values from the profiles of the other organisations linked on Wikidata
+        # profiles  = IDs {org: playerid} of the linked profiles, e.g. resolved in bulk, looked up if None
+        infolist = dict(self.fetch(org, playerid))
+        if not linked or all(infolist.get(name) not in (None, "", []) for name in linked_fields):
+            return infolist
+        if profiles is None:
+            try:
+                profiles = self.getProfiles(org, playerid)
+            except Exception as e:
+                metrics.error("profiles", e)
+                profiles = {}
+        # The fetches of the linked profiles count towards the trace of the calling request
+        others = {other: self.__executor.submit(metrics.bind(self.fetch), other, otherid)
+                  for other, otherid in profiles.items() if other != org and other in self.__extractors}
+        for other in merge_order:
+            if other not in others:
+                continue
+            try:
+                values = others[other].result()
+            except Exception as e:
+                # A missing secondary profile does not fail the player
+                metrics.error("fetch_" + other, e)
+                continue
+            for name, value in values.items():
+                if infolist.get(name) in (None, "", []):
+                    infolist[name] = value
+        return infolist
+
+    # Access of private variables
+    extractors = property(getExtractors)
+
+
+def findPerson(data):
+    # Function that returns the first schema.org Person in decoded JSON-LD or None
+    if isinstance(data, list):
+        for item in data:
+            person = findPerson(item)
+            if person is not None:
+                return person
+        return None
+    if not isinstance(data, dict):
+        return None
+    types = data.get("@type")
+    if types == "Person" or (isinstance(types, list) and "Person" in types):
+        return data
+    for name in ("@graph", "mainEntity", "about"):
+        if name in data:
+            person = findPerson(data[name])
+            if person is not None:
+                return person
+    return None
+
+
+def personInfolist(person):
+    # Function that maps a schema.org Person to the keys of the infolist, only values found are returned
+    infolist = {}
+    if person.get("givenName"):
+        infolist["firstname"] = str(person["givenName"]).strip()
+    if person.get("familyName"):
+        infolist["lastname"] = str(person["familyName"]).strip()
+    if person.get("birthDate"):
+        infolist["birthday"] = str(person["birthDate"])[:10]
+    nationality = person.get("nationality")
+    if isinstance(nationality, dict):
+        nationality = nationality.get("alternateName") or nationality.get("name")
+    if isinstance(nationality, str) and re.fullmatch(r"[A-Z]{3}", nationality.strip()):
+        infolist["countrycode"] = nationality.strip()
+    birthplace = person.get("birthPlace")
+    if isinstance(birthplace, dict):
+        birthplace = birthplace.get("name")
+    if birthplace:
+        infolist["birthplace"] = str(birthplace).strip()
+    height = quantityValue(person.get("height"), 100, 3)
+    if height:
+        infolist["height"] = height
+    weight = quantityValue(person.get("weight"))
+    if weight:
+        infolist["weight"] = weight
+    return infolist
+
+
+def quantityValue(value, factor=1, below=0):
+    # Function that returns the number of a schema.org quantity as text, e.g. of "185 cm" or {"value": 1.85}
+    # factor    = multiplier for values below the limit below, e.g. 100 to turn metres into centimetres
+    if isinstance(value, dict):
+        value = value.get("value")
+    match = re.search(r"\d+(\.\d+)?", str(value or ""))
+    if not match:
+        return ""
+    number = float(match.group(0))
+    if number < below:
+        number *= factor
+    return str(int(round(number)))
+
+
+# Process-wide engine, configured with WIKITENNISBOT_FETCHWORKERS and WIKITENNISBOT_PERHOST
+fetchengine = Fetchengine(workers=int(os.environ.get("WIKITENNISBOT_FETCHWORKERS") or 16),
+                          perhost=int(os.environ.get("WIKITENNISBOT_PERHOST") or 4),
+                          parser=os.environ.get("WIKITENNISBOT_PARSER"))
+
+# Testing environment
+if __name__ == '__main__':
+    import sys
+    print(fetchengine.getInfolist(*(sys.argv[1:3] if len(sys.argv) > 2 else ("atp", "N409"))))
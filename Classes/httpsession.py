@@ -0,0 +1,142 @@
+# Name:     HTTP session pool
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Provides a process-wide, thread-safe pool of keep-alive cloudscraper sessions for all website scrapers
+
+# External imports
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Sessionpool(object):
+    # Object that hands out reusable cloudscraper sessions, so handshakes and Cloudflare challenges are paid once
+    # Public methods: getSize, getStats, setSize, acquire, release, session, get
+
+    def __init__(self, size=4, connections=10):
+        # Self method
+        # size          = maximum number of sessions (scrapers) held by the pool
+        # connections   = number of keep-alive connections per host and session
+        self.__size = size
+        self.__connections = connections
+        self.__idle = queue.LifoQueue()
+        self.__sessions = []
+        self.__lock = threading.Lock()
+        self.__created = 0
+        self.__reused = 0
+
+    def getSize(self):
+        # Method that returns the private size as public
+        return self.__size
+
+    def setSize(self, size):
+        # Method that changes the maximum number of sessions, existing sessions are kept
+        with self.__lock:
+            self.__size = max(1, int(size))
+
+    def getStats(self):
+        # Method that returns counters for session reuse and new network connections
+        with self.__lock:
+            sessions = list(self.__sessions)
+            stats = {"size": self.__size, "sessions": len(sessions), "sessions_created": self.__created,
+                     "reuse_hits": self.__reused, "idle": self.__idle.qsize()}
+        connections = 0
+        requests = 0
+        for scraper in sessions:
+            for adapter in list(scraper.adapters.values()):
+                poolmanager = getattr(adapter, "poolmanager", None)
+                if poolmanager is None:
+                    continue
+                for key in list(poolmanager.pools.keys()):
+                    pool = poolmanager.pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                        requests += pool.num_requests
+        stats["new_connections"] = connections
+        stats["requests"] = requests
+        return stats
+
+    def acquire(self, timeout=60):
+        # Method that returns an idle session, creates a new one while below size or waits for one to be released
+        # timeout   = seconds to wait for a session before TimeoutError is raised
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                scraper = self.__idle.get_nowait()
+                with self.__lock:
+                    self.__reused += 1
+                return scraper
+            except queue.Empty:
+                pass
+            with self.__lock:
+                create = self.__created < self.__size
+                if create:
+                    self.__created += 1
+            if create:
+                try:
+                    scraper = self.__createScraper()
+                except Exception:
+                    # The slot stays free for the next caller
+                    with self.__lock:
+                        self.__created -= 1
+                    raise
+                with self.__lock:
+                    self.__sessions.append(scraper)
+                return scraper
+            # Short waits, so a slot freed by a failed creation is noticed
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("No session released within " + str(timeout) + " seconds")
+            try:
+                scraper = self.__idle.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                continue
+            with self.__lock:
+                self.__reused += 1
+            return scraper
+
+    def release(self, scraper):
+        # Method that returns a session to the pool for the next caller
+        self.__idle.put(scraper)
+
+    @contextmanager
+    def session(self):
+        # Method that lends a session for the duration of a with block
+        scraper = self.acquire()
+        try:
+            yield scraper
+        finally:
+            self.release(scraper)
+
+    def get(self, url, **kwargs):
+        # Method that fetches an url with a pooled session and returns the response
+        with self.session() as scraper:
+            return scraper.get(url, **kwargs)
+
+    def __createScraper(self):
+        # Method that creates a cloudscraper session with larger keep-alive connection pools
+        # Imported on first use, so the webservice starts without the scraping stack
+        import cloudscraper
+        scraper = cloudscraper.create_scraper()
+        scraper.headers["Connection"] = "keep-alive"
+        for adapter in scraper.adapters.values():
+            adapter._pool_connections = self.__connections
+            adapter._pool_maxsize = self.__connections
+            adapter.init_poolmanager(self.__connections, self.__connections)
+        return scraper
+
+    # Access of private variables
+    size = property(getSize, setSize)
+    stats = property(getStats)
+
+
+# Process-wide pool shared by all scrapers, size can be set with WIKITENNISBOT_POOLSIZE
+sessionpool = Sessionpool(size=int(os.environ.get("WIKITENNISBOT_POOLSIZE") or 4))
+
+# Testing environment
+if __name__ == '__main__':
+    for i in range(3):
+        sessionpool.get("https://www.atptour.com/en/players/-/N409/overview")
+    print(sessionpool.stats)
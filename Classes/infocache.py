@@ -0,0 +1,129 @@
+# Name:     Player information cache
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Memoizes scraped player information with TTL, LRU eviction and an optional SQLite backend
+
+# External imports
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class Infocache(object):
+    # Object that caches results keyed by (kind, org, playerid, language) in memory and optionally on disk, results that
+    # do not depend on the language have "" as language
+    # Public methods: getStats, get, set, invalidate, clear
+
+    def __init__(self, ttl=3600, maxsize=1024, path=None):
+        # Self method
+        # ttl       = seconds a cached result stays valid
+        # maxsize   = maximum number of results kept in memory, least recently used results are evicted first
+        # path      = optional SQLite file, results are then shared across processes and restarts
+        self.__ttl = ttl
+        self.__maxsize = maxsize
+        self.__path = path
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__db = None
+        if path:
+            self.__db = sqlite3.connect(path, check_same_thread=False)
+            self.__db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, stored REAL)")
+            self.__db.commit()
+
+    def getStats(self):
+        # Method that returns hit, miss and eviction counters
+        with self.__lock:
+            return {"hits": self.__hits, "misses": self.__misses, "evictions": self.__evictions,
+                    "entries": len(self.__entries)}
+
+    def get(self, key):
+        # Method that returns a copy of the cached value or None if missing or expired
+        now = time.time()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and now - entry[1] < self.__ttl:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return copy.deepcopy(entry[0])
+            if entry is not None:
+                del self.__entries[key]
+            if self.__db is not None:
+                row = self.__db.execute("SELECT value, stored FROM cache WHERE key = ?",
+                                        (self.__dbkey(key),)).fetchone()
+                if row is not None and now - row[1] < self.__ttl:
+                    value = json.loads(row[0])
+                    self.__store(key, value, row[1])
+                    self.__hits += 1
+                    return copy.deepcopy(value)
+            self.__misses += 1
+            return None
+
+    def set(self, key, value):
+        # Method that stores a value under key
+        now = time.time()
+        with self.__lock:
+            self.__store(key, copy.deepcopy(value), now)
+            if self.__db is not None:
+                self.__db.execute("INSERT OR REPLACE INTO cache (key, value, stored) VALUES (?, ?, ?)",
+                                  (self.__dbkey(key), json.dumps(value), now))
+                self.__db.execute("DELETE FROM cache WHERE stored < ?", (now - self.__ttl,))
+                self.__db.commit()
+
+    def invalidate(self, org, playerid, language=None):
+        # Method that removes all cached results of one player, for all languages if language is None, otherwise the
+        # results of that language and those that do not depend on the language
+        languages = None if language is None else ("", language)
+        with self.__lock:
+            for key in list(self.__entries):
+                if key[1] == org and key[2] == playerid and (languages is None or key[3] in languages):
+                    del self.__entries[key]
+            if self.__db is not None:
+                # The kind is any text, org, playerid and language are matched literally
+                prefix = "%|" + escapeLike(org) + "|" + escapeLike(playerid) + "|"
+                patterns = [prefix + "%"] if languages is None else [prefix + escapeLike(part) for part in languages]
+                for pattern in patterns:
+                    self.__db.execute("DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (pattern,))
+                self.__db.commit()
+
+    def clear(self):
+        # Method that removes all cached results
+        with self.__lock:
+            self.__entries.clear()
+            if self.__db is not None:
+                self.__db.execute("DELETE FROM cache")
+                self.__db.commit()
+
+    def __store(self, key, value, stored):
+        # Method that puts a value into the in-memory LRU and evicts the least recently used entries
+        self.__entries[key] = (value, stored)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__maxsize:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+
+    @staticmethod
+    def __dbkey(key):
+        # Method that turns a key tuple into the string used in SQLite
+        return "|".join(str(part) for part in key)
+
+    # Access of private variables
+    stats = property(getStats)
+
+
+def escapeLike(text):
+    # Function that escapes the wildcards of an SQLite LIKE pattern, used with ESCAPE '\'
+    return str(text).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# Process-wide cache, configured with WIKITENNISBOT_CACHE_TTL (seconds), WIKITENNISBOT_CACHE_SIZE (results in memory)
+# and WIKITENNISBOT_CACHE_PATH (SQLite file)
+infocache = Infocache(ttl=int(os.environ.get("WIKITENNISBOT_CACHE_TTL") or 3600),
+                      maxsize=int(os.environ.get("WIKITENNISBOT_CACHE_SIZE") or 1024),
+                      path=os.environ.get("WIKITENNISBOT_CACHE_PATH"))
@@ -0,0 +1,89 @@
+# Name:     Job queue
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Runs long bot edits in background threads and keeps their status for the webservice
+
+# External imports
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Jobqueue(object):
+    # Object that runs jobs in a thread pool, deduplicates identical in-flight jobs and reports their progress
+    # Public methods: getStats, submit, getStatus
+
+    def __init__(self, workers=2, keep=1000):
+        # Self method
+        # workers   = number of jobs running at the same time
+        # keep      = number of finished jobs whose status is kept
+        self.__executor = ThreadPoolExecutor(max_workers=workers)
+        self.__keep = keep
+        self.__jobs = OrderedDict()
+        self.__inflight = {}
+        self.__lock = threading.Lock()
+        self.__counter = itertools.count(1)
+        self.__deduplicated = 0
+
+    def getStats(self):
+        # Method that returns the number of jobs per status and the number of deduplicated submissions
+        with self.__lock:
+            stats = {"deduplicated": self.__deduplicated}
+            for job in self.__jobs.values():
+                stats[job["status"]] = stats.get(job["status"], 0) + 1
+            return stats
+
+    def submit(self, key, function, *args, **kwargs):
+        # Method that queues function(*args, progress=..., **kwargs) and returns the job id
+        # key       = hashable description of the job, a job with the same key still queued or running is reused
+        with self.__lock:
+            if key in self.__inflight:
+                self.__deduplicated += 1
+                return self.__inflight[key]
+            jobid = str(next(self.__counter)) + "-" + uuid.uuid4().hex[:8]
+            self.__jobs[jobid] = {"jobid": jobid, "status": "queued", "stage": "queued", "result": None, "error": "",
+                                  "created": time.time(), "finished": None}
+            self.__inflight[key] = jobid
+            self.__prune()
+        self.__executor.submit(self.__run, jobid, key, function, args, kwargs)
+        return jobid
+
+    def getStatus(self, jobid):
+        # Method that returns a copy of the status of a job or None if unknown
+        with self.__lock:
+            job = self.__jobs.get(jobid)
+            return dict(job) if job is not None else None
+
+    def __run(self, jobid, key, function, args, kwargs):
+        # Method that runs a job in a worker thread and records its result
+        def progress(stage):
+            with self.__lock:
+                self.__jobs[jobid]["stage"] = stage
+        with self.__lock:
+            self.__jobs[jobid]["status"] = "running"
+        try:
+            result = function(*args, progress=progress, **kwargs)
+            status, error = "done", ""
+        except Exception as e:
+            result, status, error = None, "failed", repr(e)
+        with self.__lock:
+            self.__jobs[jobid].update({"status": status, "stage": status, "result": result, "error": error,
+                                       "finished": time.time()})
+            self.__inflight.pop(key, None)
+
+    def __prune(self):
+        # Method that forgets the oldest finished jobs above keep
+        finished = [jobid for jobid, job in self.__jobs.items() if job["finished"] is not None]
+        for jobid in finished[:max(0, len(self.__jobs) - self.__keep)]:
+            del self.__jobs[jobid]
+
+    # Access of private variables
+    stats = property(getStats)
+
+
+# Process-wide queue of the webservice, the number of workers can be set with WIKITENNISBOT_WORKERS
+jobqueue = Jobqueue(workers=int(os.environ.get("WIKITENNISBOT_WORKERS") or 2))
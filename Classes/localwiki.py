@@ -0,0 +1,333 @@
+# Name:     Local wiki
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Stands in for the Wikipedia and Wikidata sites in dry runs, pages and items are kept in SQLite and every save
+#           is recorded as a diff
+
+# External imports
+import difflib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Calendar model of the dates on the local Wikidata, the proleptic Gregorian calendar like on Wikidata
+calendar_gregorian = "http://www.wikidata.org/entity/Q1985727"
+
+
+class Localwiki(object):
+    # Object that keeps the pages of all local sites in one SQLite file and records the would-be edits
+    # Public methods: getCounts, getSite, getText, putText, importPages, importItems, listEdits
+
+    def __init__(self, path="localwiki.db", user="WikiTennisBot"):
+        # Self method
+        # path      = SQLite file of the wiki, ":memory:" keeps it for the running process only
+        # user      = name of the bot returned by user() of the local sites
+        self.__path = path
+        self.__user = user
+        self.__lock = threading.Lock()
+        self.__db = None
+
+    def getCounts(self):
+        # Method that returns the number of stored pages and recorded edits
+        return {"pages": self.__execute("SELECT COUNT(*) FROM pages")[0][0],
+                "edits": self.__execute("SELECT COUNT(*) FROM edits")[0][0]}
+
+    def getSite(self, language="de", family="wikipedia"):
+        # Method that returns a site of the local wiki, used by wikisessions instead of pywikibot.Site
+        return Localsite(self, language, family, self.__user)
+
+    def getText(self, language, family, title):
+        # Method that returns the text of a page or None if the page does not exist
+        rows = self.__execute("SELECT text FROM pages WHERE language = ? AND family = ? AND title = ?",
+                              (language, family, normalizeTitle(title)))
+        return rows[0][0] if rows else None
+
+    def putText(self, language, family, title, text, summary="", user=""):
+        # Method that saves a page and records the edit as unified diff, returns the diff
+        # summary   = edit summary of the would-be edit
+        # user      = name of the editing user, empty for imported pages
+        title = normalizeTitle(title)
+        with self.__lock:
+            self.__connect()
+            rows = self.__db.execute("SELECT text FROM pages WHERE language = ? AND family = ? AND title = ?",
+                                     (language, family, title)).fetchall()
+            current = rows[0][0] if rows else ""
+            diff = "".join(difflib.unified_diff(current.splitlines(True), text.splitlines(True),
+                                                "a/" + title, "b/" + title))
+            now = time.time()
+            self.__db.execute("""INSERT INTO pages (language, family, title, text, saved) VALUES (?, ?, ?, ?, ?)
+                                 ON CONFLICT (language, family, title) DO UPDATE SET
+                                     text = excluded.text, saved = excluded.saved""",
+                              (language, family, title, text, now))
+            if user:
+                self.__db.execute("""INSERT INTO edits (language, family, title, summary, user, saved, diff)
+                                     VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                                  (language, family, title, summary, user, now, diff))
+        return diff
+
+    def importPages(self, language, family, pages):
+        # Method that stores existing pages without recording edits, e.g. the articles of a dry run
+        # pages     = dictionary {title: text}
+        for title, text in pages.items():
+            self.putText(language, family, title, text)
+        return len(pages)
+
+    def importItems(self, language, family, items):
+        # Method that stores existing Wikidata items without recording edits, e.g. the items of an ITF bot dry run
+        # items     = dictionary {qid: {property: value}} of external IDs
+        for qid, values in items.items():
+            claims = {prop: [stringClaim(qid, prop, value)] for prop, value in values.items()}
+            self.putText(language, family, qid, itemText({"id": qid, "claims": claims}))
+        return len(items)
+
+    def listEdits(self, language=None, title=None):
+        # Method that returns the recorded edits as dictionaries, oldest first
+        query = "SELECT * FROM edits WHERE 1 = 1"
+        values = []
+        if language is not None:
+            query += " AND language = ?"
+            values.append(language)
+        if title is not None:
+            query += " AND title = ?"
+            values.append(normalizeTitle(title))
+        return [dict(row) for row in self.__execute(query + " ORDER BY id", values)]
+
+    def __execute(self, query, values=()):
+        # Method that runs one statement and returns all rows
+        with self.__lock:
+            self.__connect()
+            return self.__db.execute(query, values).fetchall()
+
+    def __connect(self):
+        # Method that opens the database on first use, the lock is held by the caller
+        if self.__db is None:
+            self.__db = sqlite3.connect(self.__path, check_same_thread=False, isolation_level=None)
+            self.__db.row_factory = sqlite3.Row
+            self.__db.execute("""CREATE TABLE IF NOT EXISTS pages (
+                                    language TEXT NOT NULL, family TEXT NOT NULL, title TEXT NOT NULL,
+                                    text TEXT NOT NULL, saved REAL, PRIMARY KEY (language, family, title))""")
+            self.__db.execute("""CREATE TABLE IF NOT EXISTS edits (
+                                    id INTEGER PRIMARY KEY, language TEXT NOT NULL, family TEXT NOT NULL,
+                                    title TEXT NOT NULL, summary TEXT, user TEXT, saved REAL, diff TEXT)""")
+
+    # Access of private variables
+    counts = property(getCounts)
+
+
+class Localfamily(object):
+    # Object that names the family of a local site like pywikibot.family.Family
+    def __init__(self, name):
+        # Self method
+        # name      = wiki family, includes wikipedia, wikidata
+        self.name = name
+
+
+class Localsite(object):
+    # Object that answers the part of pywikibot.Site used by the bot for one language and family of a local wiki
+    # Public methods: getWiki, user, login, getPage, getItem, data_repository, calendarmodel,
+    #                 get_repo_for_entity_type
+
+    def __init__(self, wiki, code, family, username):
+        # Self method
+        # wiki      = Localwiki holding the pages
+        # code      = wiki language code, e.g. de, test
+        # family    = wiki family, includes wikipedia, wikidata
+        # username  = name of the bot
+        self.__wiki = wiki
+        self.code = code
+        self.family = Localfamily(family)
+        self.__username = username
+
+    def getWiki(self):
+        # Method that returns the private wiki as public
+        return self.__wiki
+
+    def user(self):
+        # Method that returns the name of the logged in bot
+        return self.__username
+
+    def login(self):
+        # Method that logs in, local sites need no login
+        return True
+
+    def getPage(self, title):
+        # Method that returns a page of this site, used by getPage of the wiki sessions instead of pywikibot.Page
+        return Localpage(self, title)
+
+    def getItem(self, qid):
+        # Method that returns a Wikidata item of this site, used by the ITF bot instead of pywikibot.ItemPage
+        return Localitem(self, qid)
+
+    def data_repository(self):
+        # Method that returns the local Wikidata, sites of the wikidata family are their own repository
+        if self.family.name == "wikidata":
+            return self
+        return self.__wiki.getSite("wikidata", "wikidata")
+
+    def calendarmodel(self):
+        # Method that returns the calendar model of dates, read by pywikibot.WbTime
+        return calendar_gregorian
+
+    def get_repo_for_entity_type(self, entity_type):
+        # Method that returns the repository of properties, read by pywikibot.Claim.fromJSON
+        return self.data_repository()
+
+    # Access of private variables
+    wiki = property(getWiki)
+
+
+class Localpage(object):
+    # Object that answers the part of pywikibot.Page used by the bot, saves are recorded as diffs by the local wiki
+    # Public methods: title, exists, get, getText, setText, save
+
+    def __init__(self, site, title):
+        # Self method
+        # site      = Localsite of the page
+        # title     = title of the page
+        self.site = site
+        self.__title = normalizeTitle(title)
+        self.__text = None
+
+    def title(self):
+        # Method that returns the title of the page
+        return self.__title
+
+    def exists(self):
+        # Method that returns whether the page is stored
+        return self.__load() is not None
+
+    def get(self, force=False):
+        # Method that returns the stored text of the page and raises ValueError if it does not exist
+        # force     = ignored, the text is always read from the local wiki
+        text = self.__load()
+        if text is None:
+            raise ValueError("Page " + self.__title + " does not exist in the local wiki")
+        return text
+
+    def getText(self):
+        # Method that returns the text to be saved, the stored text if not set
+        if self.__text is None:
+            self.__text = self.__load() or ""
+        return self.__text
+
+    def setText(self, text):
+        # Method that sets the text to be saved, wiki code objects are turned into text
+        self.__text = None if text is None else str(text)
+
+    def save(self, summary="", **kwargs):
+        # Method that stores the text and records the edit with its summary as diff
+        self.site.wiki.putText(self.site.code, self.site.family.name, self.__title, self.getText(), summary,
+                               self.site.user())
+
+    def __load(self):
+        # Method that reads the stored text of the page
+        return self.site.wiki.getText(self.site.code, self.site.family.name, self.__title)
+
+    # Access of private variables
+    text = property(getText, setText)
+
+
+class Localitem(object):
+    # Object that answers the part of pywikibot.ItemPage used by the ITF bot, the entity is kept as JSON page titled
+    # by its QID and edits are recorded as diffs of it
+    # Public methods: getID, exists, get, getClaims, editEntity
+
+    def __init__(self, site, qid):
+        # Self method
+        # site      = Localsite of the wikidata family
+        # qid       = ID of the item, e.g. Q1
+        self.site = site
+        self.__qid = qid.upper()
+        self.__claims = None
+
+    def getID(self):
+        # Method that returns the QID of the item
+        return self.__qid
+
+    def exists(self):
+        # Method that returns whether the item is stored
+        return self.__load() is not None
+
+    def get(self, force=False):
+        # Method that returns the stored entity as dictionary, an empty item if it does not exist
+        # force     = ignored, the entity is always read from the local wiki
+        text = self.__load()
+        return json.loads(text) if text is not None else {"id": self.__qid, "claims": {}}
+
+    def getClaims(self):
+        # Method that returns the statements as {property: [pywikibot.Claim]} like ItemPage.claims
+        if self.__claims is None:
+            # Imported on first use, only the ITF bot reads items
+            import pywikibot
+            self.__claims = {prop: [pywikibot.Claim.fromJSON(self.site, claim) for claim in claims]
+                             for prop, claims in self.get()["claims"].items()}
+        return self.__claims
+
+    def editEntity(self, data, summary="", **kwargs):
+        # Method that applies the claims of a wbeditentity request and records the edit with its summary as diff
+        # data      = dictionary with a list of claim JSON, claims with remove are deleted, claims with a known id are
+        #             replaced and all others are added with a new id
+        entity = self.get()
+        for claim in data.get("claims", []):
+            if "remove" in claim:
+                for prop in entity["claims"]:
+                    entity["claims"][prop] = [old for old in entity["claims"][prop] if old.get("id") != claim["id"]]
+                continue
+            claims = entity["claims"].setdefault(claim["mainsnak"]["property"], [])
+            ids = [old.get("id") for old in claims]
+            if claim.get("id") in ids:
+                claims[ids.index(claim["id"])] = claim
+            else:
+                claims.append(dict(claim, id=self.__qid + "$" + str(uuid.uuid4())))
+        entity["claims"] = {prop: claims for prop, claims in entity["claims"].items() if claims}
+        self.site.wiki.putText(self.site.code, self.site.family.name, self.__qid, itemText(entity), summary,
+                               self.site.user())
+        self.__claims = None
+
+    def __load(self):
+        # Method that reads the stored entity of the item as JSON text
+        return self.site.wiki.getText(self.site.code, self.site.family.name, self.__qid)
+
+    # Access of private variables
+    claims = property(getClaims)
+
+
+def stringClaim(qid, prop, value, datatype="external-id"):
+    # Function that returns the JSON of a normal rank statement with a string value, e.g. an external ID
+    # datatype  = datatype of the property, includes external-id, url
+    return {"mainsnak": {"snaktype": "value", "property": prop, "datatype": datatype,
+                         "datavalue": {"value": value, "type": "string"}},
+            "type": "statement", "rank": "normal", "id": qid + "$" + str(uuid.uuid4())}
+
+
+def itemText(entity):
+    # Function that writes an entity as stable JSON, one value per line, so the recorded diffs stay readable
+    return json.dumps(entity, indent=1, sort_keys=True) + "\n"
+
+
+def normalizeTitle(title):
+    # Function that writes titles the way the wiki stores them, with spaces and an uppercase first letter
+    title = title.replace("_", " ").strip()
+    return title[:1].upper() + title[1:]
+
+
+# Process-wide local wiki, only used if WIKITENNISBOT_LOCALWIKI names its SQLite file, otherwise the real wikis are
+# edited
+localwiki = Localwiki(os.environ["WIKITENNISBOT_LOCALWIKI"]) if os.environ.get("WIKITENNISBOT_LOCALWIKI") else None
+
+# Testing environment: python -m Classes.localwiki [localwiki.db] lists the recorded edits
+if __name__ == '__main__':
+    import sys
+    a = Localwiki(sys.argv[1] if len(sys.argv) > 1 else ":memory:")
+    if len(sys.argv) == 1:
+        a.importPages("de", "wikipedia", {"Rafael_Nadal": "{{Infobox Tennisspieler\n| Vorname = Rafael\n}}\n"})
+        page = a.getSite("de", "wikipedia").getPage("Rafael Nadal")
+        page.text = page.get().replace("Rafael", "Rafael Nadal")
+        page.save("Test edit")
+    for edit in a.listEdits():
+        print(edit["language"] + "." + edit["family"] + " " + edit["title"] + " - " + edit["summary"])
+        print(edit["diff"])
+    print(a.counts)
@@ -0,0 +1,166 @@
+# Name:     Metrics
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Collects stage timings, counters and errors of the bot and renders them for Prometheus and the logs
+
+# External imports
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# Logger for the structured one-line JSON logs of requests and bot runs
+logger = logging.getLogger("wikitennisbot")
+
+
+class Metrics(object):
+    # Object that aggregates timers and counters per stage, recording only costs a clock read and a lock
+    # Public methods: getStats, timer, count, error, trace, bind, render
+
+    def __init__(self, prefix="wikitennisbot"):
+        # Self method
+        # prefix    = prefix of all metric names
+        self.__prefix = prefix
+        self.__lock = threading.Lock()
+        self.__timers = {}
+        self.__counters = {}
+        self.__errors = {}
+        self.__local = threading.local()
+
+    def getStats(self):
+        # Method that returns a copy of all timers {stage: [count, seconds, max]}, counters and errors
+        with self.__lock:
+            return {"timers": {stage: list(timer) for stage, timer in self.__timers.items()},
+                    "counters": dict(self.__counters),
+                    "errors": {stage + "/" + error: count for (stage, error), count in self.__errors.items()}}
+
+    @contextmanager
+    def timer(self, stage):
+        # Method that times the enclosed block as stage and counts exceptions raised in it by type
+        # stage     = name of the stage, e.g. fetch, parse, sparql, login, save
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(stage, e)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            with self.__lock:
+                timer = self.__timers.setdefault(stage, [0, 0.0, 0.0])
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+                # A trace can be shared with worker threads by bind
+                stages = getattr(self.__local, "stages", None)
+                if stages is not None:
+                    stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def count(self, name, value=1):
+        # Method that increases the counter name by value
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def error(self, stage, exception):
+        # Method that counts an exception of a stage by its type
+        with self.__lock:
+            key = (stage, type(exception).__name__)
+            self.__errors[key] = self.__errors.get(key, 0) + 1
+
+    @contextmanager
+    def trace(self, event, **fields):
+        # Method that collects the stage timings of the enclosed block in this thread and logs them as one JSON line
+        # event     = name of the logged event, e.g. wikicode
+        # fields    = additional values of the log line, e.g. playerid
+        outer = getattr(self.__local, "stages", None)
+        self.__local.stages = {}
+        start = time.perf_counter()
+        error = ""
+        try:
+            yield fields
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            stages = self.__local.stages
+            self.__local.stages = outer
+            if logger.isEnabledFor(logging.INFO):
+                record = {"event": event, "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
+                record.update(fields)
+                record["stages_ms"] = {stage: round(seconds * 1000, 1) for stage, seconds in stages.items()}
+                if error:
+                    record["error"] = error
+                logger.info(json.dumps(record, default=str))
+
+    def bind(self, function):
+        # Method that returns function running with the trace of the calling thread, e.g. for executor threads
+        # The stage times of parallel workers add up, so the stages of a trace can exceed its duration
+        stages = getattr(self.__local, "stages", None)
+
+        def traced(*args, **kwargs):
+            outer = getattr(self.__local, "stages", None)
+            self.__local.stages = stages
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.__local.stages = outer
+        return traced
+
+    def render(self, gauges=None):
+        # Method that returns all metrics in the Prometheus text format
+        # gauges    = optional dictionary {component: stats dictionary}, numeric values are exported as gauges
+        prefix = self.__prefix
+        stats = self.getStats()
+        lines = ["# HELP " + prefix + "_stage_seconds Time spent per stage",
+                 "# TYPE " + prefix + "_stage_seconds summary"]
+        for stage, (count, seconds, maximum) in sorted(stats["timers"].items()):
+            lines.append(prefix + '_stage_seconds_count{stage="' + stage + '"} ' + str(count))
+            lines.append(prefix + '_stage_seconds_sum{stage="' + stage + '"} ' + repr(seconds))
+        lines.append("# HELP " + prefix + "_stage_seconds_max Longest run per stage")
+        lines.append("# TYPE " + prefix + "_stage_seconds_max gauge")
+        for stage, (count, seconds, maximum) in sorted(stats["timers"].items()):
+            lines.append(prefix + '_stage_seconds_max{stage="' + stage + '"} ' + repr(maximum))
+        lines.append("# HELP " + prefix + "_errors_total Exceptions per stage and type")
+        lines.append("# TYPE " + prefix + "_errors_total counter")
+        for key, count in sorted(stats["errors"].items()):
+            stage, error = key.split("/", 1)
+            lines.append(prefix + '_errors_total{stage="' + stage + '",type="' + error + '"} ' + str(count))
+        for name, count in sorted(stats["counters"].items()):
+            lines.append("# TYPE " + prefix + "_" + name + "_total counter")
+            lines.append(prefix + "_" + name + "_total " + str(count))
+        for component, values in sorted((gauges or {}).items()):
+            for name, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append("# TYPE " + prefix + "_" + component + "_" + name + " gauge")
+                    lines.append(prefix + "_" + component + "_" + name + " " + str(value))
+        return "\n".join(lines) + "\n"
+
+    # Access of private variables
+    stats = property(getStats)
+
+
+# Process-wide metrics shared by the scraper, the infobox renderer, the wiki editor and the webservice
+metrics = Metrics()
+
+# Testing environment
+if __name__ == '__main__':
+    def fetchLinked():
+        with metrics.timer("sparql"):
+            time.sleep(0.01)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with metrics.trace("test", playerid="N409"):
+        with metrics.timer("fetch"):
+            time.sleep(0.01)
+        # A bound worker thread adds its stages to the trace of this thread
+        worker = threading.Thread(target=metrics.bind(fetchLinked))
+        worker.start()
+        worker.join()
+        try:
+            with metrics.timer("parse"):
+                raise ValueError("broken page")
+        except ValueError:
+            pass
+    metrics.count("cache_hits")
+    print(metrics.render({"infocache": {"hits": 1, "misses": 2}}))
@@ -0,0 +1,164 @@
+# Name:     Player state store
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Remembers the last scraped infolist and the last published infobox of every player between runs
+
+# External imports
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Time the stored infolist was last settled on the wiki, by publishing an infobox or by finding the article up to date
+settled = "MAX(COALESCE(published, 0), COALESCE(verified, 0))"
+
+
+class Playerstore(object):
+    # Object that keeps one row per (org, playerid, language) with the last scrape and the last published infobox
+    # Public methods: getCounts, getPlayer, getInfolist, getRefreshed, putInfolist, putPublished, putVerified,
+    #                 isPublished, listStale, listChanged
+
+    def __init__(self, path="players.db"):
+        # Self method
+        # path      = SQLite file of the store, ":memory:" keeps it for the running process only
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__db = None
+
+    def getCounts(self):
+        # Method that returns the number of players, of published players and of players changed since publishing or
+        # verifying
+        row = self.__execute("SELECT COUNT(*), COUNT(published), SUM(changed > " + settled + ") FROM players")[0]
+        return {"players": row[0], "published": row[1], "changed": row[2] or 0}
+
+    def getPlayer(self, org, playerid, language):
+        # Method that returns the stored state of a player with decoded infolist and params or None if unknown
+        rows = self.__execute("SELECT * FROM players WHERE org = ? AND playerid = ? AND language = ?",
+                              (org, playerid.upper(), language))
+        if not rows:
+            return None
+        player = dict(rows[0])
+        player["infolist"] = json.loads(player["infolist"]) if player["infolist"] else None
+        player["params"] = json.loads(player["params"]) if player["params"] else None
+        return player
+
+    def getInfolist(self, org, playerid, language, maxage=None):
+        # Method that returns the last scraped infolist of a player or None if unknown or older than maxage seconds
+        player = self.getPlayer(org, playerid, language)
+        if player is None or player["infolist"] is None:
+            return None
+        if maxage is not None and time.time() - player["scraped"] > maxage:
+            return None
+        return player["infolist"]
+
+    def getRefreshed(self, language):
+        # Method that returns {(org, playerid): time of the last scrape} of all scraped players of a language
+        # A scrape only counts if everything it changed was published or found up to date afterwards, otherwise the
+        # time is 0, e.g. after a failed save or a stop before the edit
+        rows = self.__execute("SELECT org, playerid, CASE WHEN changed <= " + settled + """ THEN scraped ELSE 0 END
+                                 FROM players WHERE language = ? AND scraped IS NOT NULL""", (language,))
+        return {(row[0], row[1]): row[2] for row in rows}
+
+    def putInfolist(self, org, playerid, language, infolist):
+        # Method that stores a scraped infolist and returns whether it differs from the stored one
+        data = json.dumps(infolist, sort_keys=True)
+        infohash = hashlib.sha1(data.encode("utf-8")).hexdigest()
+        now = time.time()
+        rows = self.__execute("SELECT infohash FROM players WHERE org = ? AND playerid = ? AND language = ?",
+                              (org, playerid.upper(), language))
+        self.__execute("""INSERT INTO players (org, playerid, language, infolist, infohash, scraped, changed)
+                          VALUES (?, ?, ?, ?, ?, ?, ?)
+                          ON CONFLICT (org, playerid, language) DO UPDATE SET
+                              infolist = excluded.infolist, infohash = excluded.infohash, scraped = excluded.scraped,
+                              changed = CASE WHEN players.infohash IS excluded.infohash
+                                             THEN players.changed ELSE excluded.changed END""",
+                       (org, playerid.upper(), language, data, infohash, now, now))
+        return not rows or rows[0][0] != infohash
+
+    def putPublished(self, org, playerid, language, params, title):
+        # Method that stores the parameters of a published infobox and where it was published
+        # params    = dictionary as returned by infoboxParams
+        # title     = title of the saved page
+        self.__execute("""INSERT INTO players (org, playerid, language, params, published, title)
+                          VALUES (?, ?, ?, ?, ?, ?)
+                          ON CONFLICT (org, playerid, language) DO UPDATE SET
+                              params = excluded.params, published = excluded.published, title = excluded.title""",
+                       (org, playerid.upper(), language, json.dumps(params, sort_keys=True), time.time(), title))
+
+    def putVerified(self, org, playerid, language):
+        # Method that stores that the article already matches the stored infolist, so nothing has to be published
+        self.__execute("""INSERT INTO players (org, playerid, language, verified) VALUES (?, ?, ?, ?)
+                          ON CONFLICT (org, playerid, language) DO UPDATE SET verified = excluded.verified""",
+                       (org, playerid.upper(), language, time.time()))
+
+    def isPublished(self, org, playerid, language, params):
+        # Method that returns the title of the last published infobox if it has the same parameters, otherwise ""
+        player = self.getPlayer(org, playerid, language)
+        if player is None or player["params"] != params:
+            return ""
+        return player["title"] or ""
+
+    def listStale(self, maxage, language=None, org=None):
+        # Method that returns the (org, playerid) of players not scraped for maxage seconds, oldest first
+        return self.__list("scraped IS NULL OR scraped < ?", [time.time() - maxage], language, org, "scraped")
+
+    def listChanged(self, language=None, org=None):
+        # Method that returns the (org, playerid) of players whose infolist changed since the last published infobox
+        # or since their article was found up to date
+        return self.__list("infohash IS NOT NULL AND changed > " + settled, [], language, org, "changed")
+
+    def __list(self, condition, values, language, org, order):
+        # Method that runs a filtered query on the players and returns (org, playerid) pairs
+        query = "SELECT org, playerid FROM players WHERE (" + condition + ")"
+        if language is not None:
+            query += " AND language = ?"
+            values.append(language)
+        if org is not None:
+            query += " AND org = ?"
+            values.append(org)
+        rows = self.__execute(query + " ORDER BY " + order + ", org, playerid", values)
+        return [(row[0], row[1]) for row in rows]
+
+    def __execute(self, query, values=()):
+        # Method that runs one statement and returns all rows, the database is opened on first use
+        with self.__lock:
+            if self.__db is None:
+                self.__db = sqlite3.connect(self.__path, check_same_thread=False, isolation_level=None)
+                self.__db.row_factory = sqlite3.Row
+                self.__db.execute("PRAGMA journal_mode=WAL")
+                self.__db.execute("""CREATE TABLE IF NOT EXISTS players (
+                                        org TEXT NOT NULL, playerid TEXT NOT NULL, language TEXT NOT NULL,
+                                        infolist TEXT, infohash TEXT, scraped REAL, changed REAL,
+                                        params TEXT, published REAL, title TEXT, verified REAL,
+                                        PRIMARY KEY (org, playerid, language))""")
+                # Stores of earlier versions are extended by the columns added since
+                columns = [row[1] for row in self.__db.execute("PRAGMA table_info(players)")]
+                if "verified" not in columns:
+                    self.__db.execute("ALTER TABLE players ADD COLUMN verified REAL")
+                self.__db.execute("CREATE INDEX IF NOT EXISTS players_scraped ON players (language, scraped)")
+            return self.__db.execute(query, values).fetchall()
+
+    # Access of private variables
+    counts = property(getCounts)
+
+
+# Process-wide store opened on first use, configured with WIKITENNISBOT_PLAYERSTORE (SQLite file, default players.db)
+playerstore = Playerstore(os.environ.get("WIKITENNISBOT_PLAYERSTORE") or "players.db")
+
+# Testing environment: python -m Classes.playerstore [store.db]
+if __name__ == '__main__':
+    import sys
+    a = Playerstore(sys.argv[1] if len(sys.argv) > 1 else ":memory:")
+    print(a.putInfolist("atp", "N409", "de", {"singlesranking": "2"}), a.putInfolist("atp", "N409", "de",
+                                                                                     {"singlesranking": "2"}))
+    print(a.listChanged("de"), a.counts)
+    a.putPublished("atp", "N409", "de", {"AktuelleEinzelPlatzierung": "2"}, "Benutzer:Bot/PlayerInfobox/N409")
+    print(a.listChanged("de"), a.isPublished("atp", "N409", "de", {"AktuelleEinzelPlatzierung": "2"}), a.counts)
+    print(a.listStale(3600), a.listStale(0))
+    # A player whose article already matches the scrape is settled without publishing
+    a.putInfolist("atp", "D0001", "de", {"singlesranking": "7"})
+    print(a.listChanged("de"), a.getRefreshed("de"))
+    a.putVerified("atp", "D0001", "de")
+    print(a.listChanged("de"), a.getRefreshed("de"), a.counts)
@@ -0,0 +1,128 @@
+# Name:     Ranking snapshot
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Reads the ATP singles and doubles ranking listings once and provides the current rankings of all players
+
+# External imports
+import re
+from urllib.parse import urlsplit
+
+# Internal imports
+from Classes.atpparser import classMatches
+from Classes.httpsession import sessionpool
+from Classes.metrics import metrics
+from Classes.sources import atp_url
+
+# Ranking listings of all ranked players, one fetch per listing
+atp_rankings_url = atp_url + "/en/rankings/{listing}?rankRange=0-5000"
+
+# Infobox parameters filled from a listing, the other parameters keep the values of the last full update
+ranking_fields = {"singles": "AktuelleEinzelPlatzierung", "doubles": "AktuelleDoppelPlatzierung"}
+
+
+class Rankings(object):
+    # Object that holds the current ATP rankings of all players as {playerid: rank} per listing
+    # Public methods: getDate, getRanks, getPlayers, getInfolist, getFields, loadListing
+
+    def __init__(self, pages=None):
+        # Self method
+        # pages     = optional dictionary {listing: html or path of a saved page} per listing (singles, doubles),
+        #             listings not given are fetched from the ATP website
+        self.__pages = pages or {}
+        self.__ranks = {}
+        self.__date = ""
+        for listing in ranking_fields:
+            self.loadListing(listing)
+
+    def getDate(self):
+        # Method that returns the date of the ranking release as YYYY-MM-DD
+        return self.__date
+
+    def getRanks(self):
+        # Method that returns the rankings {listing: {playerid: rank}}
+        return self.__ranks
+
+    def getPlayers(self):
+        # Method that returns all ranked players as (org, playerid) list, e.g. for Wikibatch
+        playerids = set()
+        for ranks in self.__ranks.values():
+            playerids.update(ranks)
+        return [("atp", playerid) for playerid in sorted(playerids)]
+
+    def getInfolist(self, playerid):
+        # Method that returns the ranking part of the infolist of a player
+        # A listing covers all ranked players, so players missing from a read listing are unranked and get ""
+        infolist = {"updated": self.__date}
+        for listing in ranking_fields:
+            if self.__ranks[listing]:
+                infolist[listing + "ranking"] = self.__ranks[listing].get(playerid, "")
+        return infolist
+
+    def getFields(self, playerid):
+        # Method that returns the infobox parameters that can be updated for a player, those of empty listings keep
+        # their value
+        return [field for listing, field in ranking_fields.items() if self.__ranks[listing]]
+
+    def loadListing(self, listing):
+        # Method that reads one listing from the given page or the ATP website
+        # listing   = includes singles, doubles
+        html = self.__pages.get(listing)
+        if html is None:
+            with metrics.timer("fetch"):
+                html = sessionpool.get(atp_rankings_url.format(listing=listing)).content
+        elif isinstance(html, str) and not html.lstrip().startswith("<"):
+            with open(html, "rb") as page_file:
+                html = page_file.read()
+        with metrics.timer("parse"):
+            date, ranks = parseRankings(html)
+        self.__date = max(self.__date, date)
+        self.__ranks[listing] = ranks
+        return ranks
+
+    # Access of private variables
+    date = property(getDate)
+    ranks = property(getRanks)
+    players = property(getPlayers)
+
+
+def parseRankings(html):
+    # Function that returns the release date and {playerid: rank} of an ATP ranking listing, ties are stored without T
+    # html      = page as bytes or text
+    from lxml import html as lxmlhtml
+    tree = lxmlhtml.fromstring(html)
+    date = ""
+    for element in tree.iter("div"):
+        if classMatches(element.get("class"), "dropdown-label"):
+            match = re.search(r"\d{4}\.\d{2}\.\d{2}", element.text_content())
+            if match:
+                date = match.group(0).replace(".", "-")
+                break
+    ranks = {}
+    for row in tree.iter("tr"):
+        rank = ""
+        playerid = ""
+        for cell in row.iter("td"):
+            cls = cell.get("class")
+            if classMatches(cls, "rank-cell"):
+                rank = cell.text_content().strip().rstrip("T")
+            elif classMatches(cls, "player-cell"):
+                for link in cell.iter("a"):
+                    # Links are relative (/en/players/...) or absolute (https://www.atptour.com/en/players/...)
+                    parts = urlsplit(link.get("href") or "").path.split("/")
+                    if len(parts) > 4 and parts[2] == "players":
+                        playerid = parts[4].upper()
+                    break
+        if rank and playerid:
+            ranks.setdefault(playerid, rank)
+    return date, ranks
+
+
+# Testing environment: python -m Classes.rankings [singles.html doubles.html]
+if __name__ == '__main__':
+    import sys
+    import time
+    start = time.perf_counter()
+    a = Rankings(dict(zip(ranking_fields, sys.argv[1:3])))
+    print(a.date, {listing: len(ranks) for listing, ranks in a.ranks.items()},
+          str(round((time.perf_counter() - start) * 1000, 1)) + " ms")
+    print(a.getInfolist("N409"), a.getFields("N409"))
@@ -0,0 +1,15 @@
+# Name:     Scrape sources
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Base urls of the tennis websites and the Wikidata Query Service, replaceable by fixture servers for dry runs
+
+# External imports
+import os
+
+# Base urls without trailing slash, configured with WIKITENNISBOT_ATPURL, WIKITENNISBOT_WTAURL and WIKITENNISBOT_ITFURL
+atp_url = (os.environ.get("WIKITENNISBOT_ATPURL") or "https://www.atptour.com").rstrip("/")
+wta_url = (os.environ.get("WIKITENNISBOT_WTAURL") or "https://www.wtatennis.com").rstrip("/")
+itf_url = (os.environ.get("WIKITENNISBOT_ITFURL") or "https://www.itftennis.com").rstrip("/")
+
+# SPARQL endpoint of all Wikidata queries, configured with WIKITENNISBOT_SPARQLURL
+sparql_url = os.environ.get("WIKITENNISBOT_SPARQLURL") or "https://query.wikidata.org/sparql"
@@ -0,0 +1,325 @@
+# Name:     Infobox sweep
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Keeps the infoboxes of all tennis players on Wikidata fresh with a prioritised, budgeted worker pool
+
+# External imports
+import argparse
+import heapq
+import json
+import threading
+import time
+import urllib
+
+from SPARQLWrapper import SPARQLWrapper, JSON
+# Internal imports
+from Classes.metrics import metrics, logger
+from Classes.playerstore import playerstore
+from Classes.rankings import Rankings
+from Classes.sources import sparql_url
+from Classes.wikidatabulk import wdproperties
+from Classes.wikiedit import Wikicode, saveOverview
+from Classes.wikisession import wikisessions
+from Classes.writescheduler import writescheduler
+
+# Refresh interval in seconds per tier, tiers are listed by priority
+sweep_tiers = {"top": 7 * 86400, "active": 30 * 86400, "retired": 365 * 86400}
+
+# Seconds until a player whose update failed is tried again
+sweep_retry = 6 * 3600
+
+# All players with an ID of an organisation, their article in one language and whether their career has ended
+query_players = """SELECT ?player ?PlayerID ?playerLabel ?playerlink ?end ?death ?atp ?wta ?itf
+    WHERE {
+    ?player wdt:%s ?PlayerID.
+    OPTIONAL {
+        ?playerlink schema:about ?player.
+        ?playerlink schema:isPartOf <https://%s.wikipedia.org/>.
+    }
+    OPTIONAL {
+        ?player rdfs:label ?playerLabel.
+        FILTER (LANG(?playerLabel) = "%s")
+    }
+    OPTIONAL { ?player wdt:P2032 ?end. }
+    OPTIONAL { ?player wdt:P570 ?death. }
+    OPTIONAL { ?player wdt:P536 ?atp. }
+    OPTIONAL { ?player wdt:P597 ?wta. }
+    OPTIONAL { ?player wdt:P599 ?itf. }
+    }"""
+
+
+class Budget(object):
+    # Object that hands out a number of tokens per hour, spread evenly with a burst of one minute
+    # Public methods: getPerhour, take
+
+    def __init__(self, perhour):
+        # Self method
+        # perhour   = tokens per hour
+        self.__perhour = float(perhour)
+        self.__capacity = max(1.0, self.__perhour / 60)
+        self.__tokens = self.__capacity
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def getPerhour(self):
+        # Method that returns the private perhour as public
+        return self.__perhour
+
+    def take(self, stop=None):
+        # Method that waits for a token and returns True, or False if the stop event is set while waiting
+        # stop      = optional threading.Event that ends the wait
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated) * self.__perhour / 3600)
+                self.__updated = now
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return True
+                wait = (1 - self.__tokens) * 3600 / self.__perhour
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(min(wait, 5)):
+                return False
+
+    # Access of private variables
+    perhour = property(getPerhour)
+
+
+class Sweep(object):
+    # Object that enumerates all players on Wikidata, queues them by due date and tier and updates their infoboxes
+    # Public methods: getStats, enumerate, run, stop
+
+    def __init__(self, language="de", site="wikipedia", orgs=("atp",), workers=4, fetches=600, edits=120,
+                 toprank=100, rankings=True):
+        # Self method
+        # language  = wikipedia language code for the site to be edited
+        # site      = wikipedia site to be edit, includes wikipedia
+        # orgs      = organisations swept, only those Playerinfo can scrape
+        # workers   = number of players handled at the same time
+        # fetches   = player scrapes per hour
+        # edits     = saved pages per hour
+        # toprank   = players up to this singles or doubles ranking are refreshed in the top tier
+        # rankings  = read the ATP ranking listings to find the top players, False treats all active players alike
+        self.__language = language
+        self.__site = site
+        self.__orgs = orgs
+        self.__workers = workers
+        self.__fetches = Budget(fetches)
+        self.__edits = Budget(edits)
+        self.__toprank = toprank
+        self.__rankings = rankings
+        self.__players = {}
+        self.__queue = []
+        self.__inflight = 0
+        self.__condition = threading.Condition()
+        self.__stopped = threading.Event()
+        self.__stats = {"done": 0, "saved": 0, "skipped": 0, "errors": 0, "fetches": 0, "edits": 0}
+        self.__started = None
+        self.__enumerated = 0
+
+    def getStats(self):
+        # Method that returns queue depth, results and the throughput per hour since the start
+        now = time.time()
+        with self.__condition:
+            stats = dict(self.__stats)
+            stats["queued"] = len(self.__queue)
+            stats["due"] = sum(1 for entry in self.__queue if entry[0] <= now)
+            stats["inflight"] = self.__inflight
+            stats["players"] = len(self.__players)
+        hours = max((now - self.__started) / 3600, 1 / 3600) if self.__started else 0
+        stats["fetches_per_hour"] = round(stats["fetches"] / hours, 1) if hours else 0.0
+        stats["edits_per_hour"] = round(stats["edits"] / hours, 1) if hours else 0.0
+        stats["budget_fetches"] = self.__fetches.perhour
+        stats["budget_edits"] = self.__edits.perhour
+        return stats
+
+    def enumerate(self):
+        # Method that reads all players from Wikidata, assigns their tier and queues new players by their last scrape
+        top = set()
+        if self.__rankings:
+            try:
+                for ranks in Rankings().ranks.values():
+                    top.update(playerid for playerid, rank in ranks.items() if int(rank) <= self.__toprank)
+            except Exception as e:
+                print("Ranking listings not available, no top tier: " + repr(e))
+        tiers = list(sweep_tiers)
+        found = {}
+        for org in self.__orgs:
+            for binding in self.__query(query_players % (wdproperties[org], self.__language, self.__language)):
+                # Only players with an article have an infobox to update
+                if "playerlink" not in binding:
+                    continue
+                key = (org, binding["PlayerID"]["value"].upper())
+                if "end" in binding or "death" in binding:
+                    tier = "retired"
+                elif org == "atp" and key[1] in top:
+                    tier = "top"
+                else:
+                    tier = "active"
+                # Several rows of the same player keep the most urgent tier
+                if key in found and tiers.index(found[key]["tier"]) <= tiers.index(tier):
+                    continue
+                # The profiles on the other websites spare the lookup of the fetch engine
+                profiles = {other: binding[other]["value"].upper() for other in wdproperties if other in binding}
+                profiles[org] = key[1]
+                found[key] = {"tier": tier, "wdinfo": {
+                    "item": binding["player"]["value"].split('entity/')[1],
+                    "sitelink": urllib.parse.unquote(binding["playerlink"]["value"].split('wiki/')[1]),
+                    "sitelabel": binding.get("playerLabel", {}).get("value", ""), "profiles": profiles}}
+        refreshed = playerstore.getRefreshed(self.__language)
+        added = 0
+        with self.__condition:
+            for key, player in found.items():
+                # Known players only change tier and Wikidata information, they keep their place in the queue
+                if key in self.__players:
+                    self.__players[key].update(player)
+                    continue
+                self.__players[key] = player
+                # Players whose last scrape was not published are due at once
+                due = refreshed[key] + sweep_tiers[player["tier"]] if refreshed.get(key) else 0
+                heapq.heappush(self.__queue, (due, tiers.index(player["tier"])) + key)
+                added += 1
+            self.__condition.notify_all()
+        self.__enumerated = time.time()
+        return added
+
+    def run(self, hours=None, report=300, reenumerate=86400):
+        # Method that runs the workers until hours passed or stop is called and logs the stats every report seconds
+        # hours         = running time, forever if None
+        # report        = seconds between two stats lines
+        # reenumerate   = seconds after which new players are read from Wikidata
+        self.__started = time.time()
+        self.__stopped.clear()
+        print("Queued " + str(self.enumerate()) + " players")
+        threads = [threading.Thread(target=self.__work, daemon=True) for i in range(self.__workers)]
+        for thread in threads:
+            thread.start()
+        end = None if hours is None else time.time() + hours * 3600
+        try:
+            while not self.__stopped.wait(report if end is None else max(0, min(report, end - time.time()))):
+                self.__report()
+                if end is not None and time.time() >= end:
+                    break
+                if time.time() - self.__enumerated > reenumerate:
+                    self.enumerate()
+        except KeyboardInterrupt:
+            pass
+        self.stop()
+        for thread in threads:
+            thread.join()
+        writescheduler.flush()
+        self.__report()
+        return self.getStats()
+
+    def stop(self):
+        # Method that lets the workers finish their current player and end
+        self.__stopped.set()
+        with self.__condition:
+            self.__condition.notify_all()
+
+    def __work(self):
+        # Method that takes due players from the queue and updates them within the budgets
+        while True:
+            entry = self.__next()
+            if entry is None:
+                return
+            due, tier, org, playerid = entry
+            player = self.__players[(org, playerid)]
+            if not self.__fetches.take(self.__stopped):
+                self.__requeue(entry, due)
+                return
+            next_due = time.time() + sweep_tiers[player["tier"]]
+            try:
+                self.__update(org, playerid, player)
+            except Exception as e:
+                next_due = time.time() + sweep_retry
+                self.__count("errors")
+                metrics.error("sweep", e)
+            self.__count("done")
+            self.__requeue(entry, next_due)
+
+    def __update(self, org, playerid, player):
+        # Method that updates the infobox of one player and saves it if it changed
+        # The Wikidata result of the enumeration spares the per player query
+        job = Wikicode(action="updateInfobox", playerid=playerid, org=org, language=self.__language, site=self.__site,
+                       wdinfo=player["wdinfo"])
+        self.__count("fetches")
+        job.buildInfobox()
+        if job.skipreason:
+            self.__count("skipped")
+            return
+        wiki = wikisessions.getSite(self.__language, self.__site)
+        if job.checkPublished(wiki, "update"):
+            self.__count("skipped")
+            return
+        if not self.__edits.take(self.__stopped):
+            return
+        line = job.savePage(wiki, "update")
+        self.__count("edits")
+        self.__count("saved")
+        saveOverview(wiki, [line], "(Manual test edit) Sweep: add updated infoboxes by " + wiki.user(),
+                     self.__language, flush=False)
+
+    def __next(self):
+        # Method that waits for the next due player, None once stopped
+        with self.__condition:
+            while not self.__stopped.is_set():
+                now = time.time()
+                if self.__queue and self.__queue[0][0] <= now:
+                    self.__inflight += 1
+                    return heapq.heappop(self.__queue)
+                self.__condition.wait(min(self.__queue[0][0] - now, 60) if self.__queue else 60)
+        return None
+
+    def __requeue(self, entry, due):
+        # Method that puts a handled player back into the queue with its next due date
+        with self.__condition:
+            self.__inflight -= 1
+            heapq.heappush(self.__queue, (due,) + tuple(entry[1:]))
+            self.__condition.notify()
+
+    def __count(self, name):
+        # Method that increases a counter of the stats and of the process-wide metrics
+        with self.__condition:
+            self.__stats[name] += 1
+        metrics.count("sweep_" + name)
+
+    def __report(self):
+        # Method that prints and logs the current stats
+        stats = self.getStats()
+        print("Sweep: " + str(stats["due"]) + " due of " + str(stats["queued"]) + " queued, " + str(stats["done"]) +
+              " done, " + str(stats["saved"]) + " saved, " + str(stats["errors"]) + " errors, " +
+              str(stats["fetches_per_hour"]) + " fetches/h, " + str(stats["edits_per_hour"]) + " edits/h")
+        logger.info(json.dumps(dict(stats, event="sweep")))
+
+    def __query(self, query):
+        # Method that runs a SPARQL query and returns its bindings
+        sparql = SPARQLWrapper(sparql_url,
+                               agent='wikitennisbot/0.1 (https://wikitennisbot.toolforge.org)')
+        sparql.setMethod('POST')
+        sparql.setQuery(query)
+        sparql.setReturnFormat(JSON)
+        with metrics.timer("sparql"):
+            return sparql.query().convert()["results"]["bindings"]
+
+    # Access of private variables
+    stats = property(getStats)
+
+
+# Command line interface, e.g. python -m Classes.sweep --fetches 600 --edits 120
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Keep the infoboxes of all players fresh")
+    parser.add_argument("--language", default="de")
+    parser.add_argument("--site", default="wikipedia")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--fetches", type=float, default=600, help="player scrapes per hour")
+    parser.add_argument("--edits", type=float, default=120, help="saved pages per hour")
+    parser.add_argument("--toprank", type=int, default=100, help="rankings refreshed weekly")
+    parser.add_argument("--no-rankings", action="store_true", help="do not read the ranking listings")
+    parser.add_argument("--hours", type=float, help="stop after this many hours")
+    parser.add_argument("--report", type=float, default=300, help="seconds between two stats lines")
+    args = parser.parse_args()
+    sweep = Sweep(language=args.language, site=args.site, workers=args.workers, fetches=args.fetches,
+                  edits=args.edits, toprank=args.toprank, rankings=not args.no_rankings)
+    print(sweep.run(hours=args.hours, report=args.report))
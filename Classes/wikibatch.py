@@ -0,0 +1,189 @@
+# Name:     Wiki batch editor
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Edits infoboxes for many players in one run with a single login and a single overview edit
+
+# External imports
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+# Internal imports
+from Classes.metrics import metrics, logger
+from Classes.wikidatabulk import Wikidataresolver
+from Classes.playerstore import playerstore
+from Classes.rankings import Rankings
+from Classes.wikicode import preloadLeads
+from Classes.wikiedit import Wikicode, editmodes, getBotuser, saveOverview
+from Classes.wikisession import getPage, wikisessions
+
+
+class Wikibatch(object):
+    # Object that runs Wikicode for a list of players and reports the result per player
+    # Public methods: getPlayers, getElapsed, getOverviewError, runBatch
+
+    def __init__(self, action, players, language="de", site="wikipedia", workers=8, rankings=None):
+        # Self method
+        # action    = action used to edit, includes createInfobox, updateInfobox, updateRankings
+        # players   = list of (org, playerid) pairs, e.g. [("atp", "N409"), ("atp", "MC10")]
+        # language  = wikipedia language code for the site to be edited
+        # site      = wikipedia site to be edit, includes wikipedia, wikidata
+        # workers   = number of players scraped concurrently
+        # rankings  = Rankings snapshot for updateRankings
+        self.__action = action
+        self.__players = list(players)
+        self.__language = language
+        self.__site = site
+        self.__workers = workers
+        self.__rankings = rankings
+        self.__elapsed = 0.0
+        self.__overviewerror = ""
+
+    def getPlayers(self):
+        # Method that returns the private players as public
+        return self.__players
+
+    def getElapsed(self):
+        # Method that returns the wall-clock time of the last run in seconds
+        return self.__elapsed
+
+    def getOverviewError(self):
+        # Method that returns the error of the last overview edit, "" if it was saved
+        return self.__overviewerror
+
+    def runBatch(self):
+        # Method that scrapes all players concurrently, saves every page after one login and updates the overview once
+        start = time.perf_counter()
+        self.__overviewerror = ""
+        mode = editmodes[self.__action]
+        # Resolve all Wikidata items with a few bulk queries and hand them to the jobs, players not found are
+        # queried again one by one
+        wdinfo = {}
+        try:
+            wdinfo = Wikidataresolver(self.__players, [self.__language], prime=False).resolve()
+        except Exception as e:
+            metrics.error("bulk_resolve", e)
+            logger.warning(json.dumps({"event": "bulk_resolve_failed", "players": len(self.__players),
+                                       "error": repr(e)}))
+        # Load the lead sections of all articles with batched revision queries and hand them to the jobs instead of
+        # fetching every article on its own
+        leads = {}
+        if self.__action != "createInfobox":
+            try:
+                leads = preloadLeads(self.__language, self.__site, [info["sitelink"] for info in wdinfo.values()])
+            except Exception as e:
+                metrics.error("preload", e)
+                logger.warning(json.dumps({"event": "preload_failed", "articles": len(wdinfo), "error": repr(e)}))
+        jobs = []
+        for org, playerid in self.__players:
+            info = wdinfo.get((org, playerid.upper(), self.__language))
+            if not info or not info["item"]:
+                info = None
+            jobs.append(Wikicode(action=self.__action, playerid=playerid, org=org, language=self.__language,
+                                 site=self.__site, rankings=self.__rankings, wdinfo=info,
+                                 lead=leads.get(info["sitelink"]) if info else None))
+        results = [{"org": job.org, "playerid": job.playerid, "status": "ok", "savedurl": "", "error": "",
+                    "reason": ""} for job in jobs]
+        # Scrape and build all infoboxes in parallel, failures are recorded per player
+        with ThreadPoolExecutor(max_workers=self.__workers) as pool:
+            futures = [pool.submit(job.buildInfobox) for job in jobs]
+        for result, future in zip(results, futures):
+            if future.exception() is not None:
+                result["status"] = "error"
+                result["error"] = "build: " + repr(future.exception())
+        for job, result in zip(jobs, results):
+            if result["status"] == "ok" and job.skipreason:
+                result["status"] = "skipped"
+                result["reason"] = job.skipreason
+        # Shared logged in site of the bot, every player page is saved with it
+        wiki = wikisessions.getSite(self.__language, self.__site)
+        page = getPage(wiki, getBotuser(wiki, self.__language) + "/PlayerInfobox")
+        overview = page.get() if page.exists() else ""
+        lines = []
+        for job, result in zip(jobs, results):
+            if result["status"] != "ok":
+                continue
+            try:
+                if job.checkPublished(wiki, mode, overview):
+                    result["status"] = "skipped"
+                    result["reason"] = job.skipreason
+                    continue
+                lines.append(job.savePage(wiki, mode))
+                result["savedurl"] = job.getSavedURL()
+            except Exception as e:
+                result["status"] = "error"
+                result["error"] = "save: " + repr(e)
+        # Include all new pages in the overview page with a single edit, the pages are saved even if it fails and the
+        # write scheduler keeps the lines for its next flush
+        if lines:
+            try:
+                saveOverview(wiki, lines, "(Manual test edit) Add " + str(len(lines)) + " Infoboxes (" + mode +
+                             ") by " + wiki.user(), self.__language)
+            except Exception as e:
+                self.__overviewerror = repr(e)
+                for result in results:
+                    if result["savedurl"]:
+                        result["error"] = "overview: " + repr(e)
+        self.__elapsed = time.perf_counter() - start
+        return results
+
+    # Access of private variables
+    players = property(getPlayers)
+    elapsed = property(getElapsed)
+    overviewerror = property(getOverviewError)
+
+
+def parsePlayers(values):
+    # Function that turns "org:playerid" strings into (org, playerid) pairs, org defaults to atp
+    players = []
+    for value in values:
+        value = value.strip()
+        if not value or value.startswith("#"):
+            continue
+        if ":" in value:
+            org, playerid = value.split(":", 1)
+        else:
+            org, playerid = "atp", value
+        players.append((org.strip().lower(), playerid.strip()))
+    return players
+
+
+# Command line interface, e.g. python -m Classes.wikibatch --action updateInfobox atp:N409 atp:MC10
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create or update infoboxes for many players in one run")
+    parser.add_argument("players", nargs="*", help="players as org:playerid, e.g. atp:N409")
+    parser.add_argument("--file", help="file with one org:playerid per line")
+    parser.add_argument("--action", default="updateInfobox", choices=list(editmodes))
+    parser.add_argument("--stale", type=float, help="add players of the player store not scraped for this many hours")
+    parser.add_argument("--changed", action="store_true",
+                        help="add players of the player store that changed since their infobox was published")
+    parser.add_argument("--singles", help="updateRankings: saved singles ranking listing, fetched if missing")
+    parser.add_argument("--doubles", help="updateRankings: saved doubles ranking listing, fetched if missing")
+    parser.add_argument("--language", default="de")
+    parser.add_argument("--site", default="wikipedia")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    values = list(args.players)
+    if args.file:
+        with open(args.file) as player_file:
+            values += player_file.read().splitlines()
+    players = parsePlayers(values)
+    if args.stale is not None:
+        players += playerstore.listStale(args.stale * 3600, args.language)
+    if args.changed:
+        players += playerstore.listChanged(args.language)
+    players = list(dict.fromkeys(players))
+    rankings = None
+    if args.action == "updateRankings":
+        # All ranked players unless players are given
+        rankings = Rankings({listing: path for listing, path in (("singles", args.singles),
+                                                                 ("doubles", args.doubles)) if path})
+        players = players or rankings.players
+    batch = Wikibatch(action=args.action, players=players, language=args.language, site=args.site,
+                      workers=args.workers, rankings=rankings)
+    for result in batch.runBatch():
+        print(result["org"] + ":" + result["playerid"] + " - " + result["status"] + " - " +
+              (result["savedurl"] or result["error"] or result["reason"]))
+    if batch.overviewerror:
+        print("Overview page not saved, its lines are queued again: " + batch.overviewerror)
+    print("Total time: " + str(round(batch.elapsed, 2)) + " s")
@@ -4,13 +4,45 @@
 # Content:  Prepares the wiki code for various Wikipedia languages and Wikidata
 
 # External imports
+import copy
+import re
 import mwparserfromhell
-from datetime import datetime
-import locale
-import pywikibot
 
 # Internal imports
+from Classes.localwiki import Localsite
+from Classes.metrics import metrics
 from Classes.templatesinfobox import *
+from Classes.wikisession import getPage, wikisessions
+
+# Formatting tables per language, used instead of the process-wide locale so renders are thread-safe
+formats = {
+    "de": {"months": ["Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August", "September", "Oktober",
+                      "November", "Dezember"],
+           "date": "{day}. {month} {year}", "thousands": ".",
+           "numberone_singles": "Liste der Weltranglistenersten im Herrentennis (Einzel)",
+           "numberone_doubles": "Liste der Weltranglistenersten im Herrentennis (Doppel)"},
+    "en": {"months": ["January", "February", "March", "April", "May", "June", "July", "August", "September",
+                      "October", "November", "December"],
+           "date": "{month} {day}, {year}", "thousands": ",",
+           "numberone_singles": "List of ATP number 1 ranked singles tennis players",
+           "numberone_doubles": "List of ATP number 1 ranked doubles tennis players"},
+}
+
+# Infobox skeletons per (language, site), parsed once at import and copied for every render
+infobox_templates = {("de", "wikipedia"): mwparserfromhell.parse(infobox_dewp).filter_templates()[0]}
+
+
+def formatDate(value, language, style="date"):
+    # Function that formats a date string YYYY-MM-DD with the formatting table of the language
+    year, month, day = value.split("-")
+    return formats[language][style].format(day=int(day), month=formats[language]["months"][int(month) - 1],
+                                           year=year)
+
+
+def formatNumber(value, language):
+    # Function that formats an integer with the thousands separator of the language, e.g. 1.234.567 in de
+    return "{:,}".format(int(value)).replace(",", formats[language]["thousands"])
+
 
 class Infobox(object):
     # Object that provides wiki code for info boxes in Wikipedia and Wikidata
@@ -30,6 +62,7 @@ class Infobox(object):
         self.__wdinfo = wdinfo
         self.__language = language
         self.__site = site
+        self.__changed = True
 
     def getLanguage(self):
         # Method that returns the private language as public
@@ -39,92 +72,185 @@ class Infobox(object):
         # Method that returns the private site as public
         return self.__site
 
+    def getChanged(self):
+        # Method that returns whether the last updateInfobox changed the infobox of the article
+        return self.__changed
+
+    def getTemplate(self):
+        # Method that returns a fresh copy of the parsed infobox skeleton for language and site
+        if (self.__language, self.__site) not in infobox_templates:
+            raise ValueError("No infobox template for " + self.__language + "." + self.__site)
+        return copy.deepcopy(infobox_templates[(self.__language, self.__site)])
+
+    def createParams(self):
+        # Method that returns the (name, value) pairs only set when a new infobox is created
+        language = self.__language
+        birthday = self.__infolist["birthday"]
+        year, month, day = birthday.split("-")
+        return [("Nationalität", "{{" + self.__infolist["countrycode"] + "}}"),
+                ("Geburtstag", formatDate(birthday, language) + "<br />({{Alter|" + year + "|" + str(int(month)) +
+                 "|" + str(int(day)) + "}} Jahre)"),
+                ("Größe", self.__infolist["height"]),
+                ("Gewicht", self.__infolist["weight"]),
+                ("ErsteProfisaison", self.__infolist["turnedpro"]),
+                ("Trainer", ", ".join(self.__infolist["coach"]))]
+
+    def updateParams(self, fields=None):
+        # Method that returns the (name, value) pairs set on creation and on every update
+        # fields    = names of the parameters to return, all if None, the infolist only needs their values
+        language = self.__language
+        infolist = self.__infolist
+        params = [("Preisgeld", lambda: formatNumber(infolist["prizemoney"], language)),
+                  ("EinzelBilanz", lambda: infolist["singlesrecord"].replace("-", ":")),
+                  ("AnzahlEinzelTitel", lambda: infolist["singlestitles"]),
+                  ("HoechsteEinzelPlatzierung", lambda: self.highRanking("singles")),
+                  ("AktuelleEinzelPlatzierung", lambda: infolist["singlesranking"]),
+                  ("DoppelBilanz", lambda: infolist["doublesrecord"].replace("-", ":")),
+                  ("AnzahlDoppelTitel", lambda: infolist["doublestitles"]),
+                  ("HoechsteDoppelPlatzierung", lambda: self.highRanking("doubles")),
+                  ("AktuelleDoppelPlatzierung", lambda: infolist["doublesranking"]),
+                  ("Updated", lambda: formatDate(infolist["updated"], language))]
+        return [(name, value()) for name, value in params if fields is None or name in fields]
+
+    def highRanking(self, mode):
+        # Method that returns the career high ranking with its date, linking number one rankings
+        # mode      = includes singles, doubles
+        ranking = self.__infolist["high" + mode + "ranking"]
+        date = formatDate(self.__infolist["high" + mode + "rankingdate"], self.__language)
+        if ranking == "1":
+            return "[[" + formats[self.__language]["numberone_" + mode] + "|" + ranking + "]] (" + date + ")"
+        return ranking + " (" + date + ")"
+
     def createInfobox(self):
         # Method that returns a "fresh" infobox template based on the infolist values
-        if self.__language == "de" and self.__site == "wikipedia":
-            locale.setlocale(locale.LC_ALL, 'de_DE.utf8')
-            template = infobox_dewp
-            infobox = mwparserfromhell.parse(template).filter_templates()[0]
-            infobox.add("Nationalität", " {{" + self.__infolist["countrycode"] + "}}")
-            birthday = datetime.strptime(self.__infolist["birthday"], "%Y-%m-%d")
-            infobox.add("Geburtstag", " " + str(birthday.strftime("%#d. %B %Y")) + "<br />({{Alter|" +
-                        str(birthday.strftime("%Y")) + "|" + str(birthday.strftime("%#m")) + "|" +
-                        str(birthday.strftime("%#d")) + "}} Jahre)")
-            infobox.add("Größe", " " + self.__infolist["height"])
-            infobox.add("Gewicht", " " + self.__infolist["weight"])
-            infobox.add("ErsteProfisaison", " " + self.__infolist["turnedpro"])
-            infobox.add("Trainer", " " + ", ".join(self.__infolist["coach"]))
-            infobox.add("Preisgeld", " " + str(locale.currency(self.__infolist["prizemoney"], grouping=True)[:-5]))
-            infobox.add("EinzelBilanz", " " + self.__infolist["singlesrecord"].replace("-", ":"))
-            infobox.add("AnzahlEinzelTitel", " " + self.__infolist["singlestitles"])
-            highsinglesrankingdate = datetime.strptime(self.__infolist["highsinglesrankingdate"], "%Y-%m-%d")
-            if self.__infolist["highsinglesranking"] == "1":
-                infobox.add("HoechsteEinzelPlatzierung", " [[Liste der Weltranglistenersten im Herrentennis (Einzel)|" +
-                            self.__infolist["highsinglesranking"] + "]] (" +
-                            str(highsinglesrankingdate.strftime("%#d. %B %Y")) + ")")
-            else:
-                infobox.add("HoechsteEinzelPlatzierung", " " + self.__infolist["highsinglesranking"] + " (" +
-                            str(highsinglesrankingdate.strftime("%#d. %B %Y")) + ")")
-            infobox.add("AktuelleEinzelPlatzierung", " " + self.__infolist["singlesranking"])
-            infobox.add("DoppelBilanz", " " + self.__infolist["doublesrecord"].replace("-", ":"))
-            infobox.add("AnzahlDoppelTitel", " " + self.__infolist["doublestitles"])
-            highdoublesrankingdate = datetime.strptime(self.__infolist["highdoublesrankingdate"], "%Y-%m-%d")
-            if self.__infolist["highdoublesranking"] == "1":
-                infobox.add("HoechsteDoppelPlatzierung", " [[Liste der Weltranglistenersten im Herrentennis (Doppel)|" +
-                            self.__infolist["highdoublesranking"] + "]] (" +
-                            str(highdoublesrankingdate.strftime("%#d. %B %Y")) + ")")
-            else:
-                infobox.add("HoechsteDoppelPlatzierung", " " + self.__infolist["highdoublesranking"] + " (" +
-                            str(highdoublesrankingdate.strftime("%#d. %B %Y")) + ")")
-            infobox.add("AktuelleDoppelPlatzierung", " " + self.__infolist["doublesranking"])
-            updated = datetime.strptime(self.__infolist["updated"], "%Y-%m-%d")
-            infobox.add("Updated", " " + str(updated.strftime("%#d. %B %Y")))
+        with metrics.timer("render"):
+            infobox = self.getTemplate()
+            for name, value in self.createParams() + self.updateParams():
+                infobox.add(name, " " + value)
         return infobox
 
-    def updateInfobox(self):
+    def updateInfobox(self, text=None, fields=None, lead=None):
         # Method that returns an updated infobox based on current values
-        site = pywikibot.Site(self.__language, self.__site)
-        page = pywikibot.Page(site, self.__wdinfo["sitelink"])
-        text = mwparserfromhell.parse(page.get())
-        # Select template and setlocal based on language
-        if self.__language == "de" and self.__site == "wikipedia":
-            locale.setlocale(locale.LC_ALL, 'de_DE.utf8')
-            template = infobox_dewp
-            for infobox in text.filter_templates():
-                if infobox.name.matches(mwparserfromhell.parse(template).filter_templates()[0].name):
-                    infobox.add("Preisgeld", str(locale.currency(self.__infolist["prizemoney"], grouping=True)[:-5]))
-                    infobox.add("EinzelBilanz", self.__infolist["singlesrecord"].replace("-", ":"))
-                    infobox.add("AnzahlEinzelTitel", self.__infolist["singlestitles"])
-                    highsinglesrankingdate = datetime.strptime(self.__infolist["highsinglesrankingdate"], "%Y-%m-%d")
-                    if self.__infolist["highsinglesranking"] == "1":
-                        infobox.add("HoechsteEinzelPlatzierung",
-                                    "[[Liste der Weltranglistenersten im Herrentennis (Einzel)|" +
-                                    self.__infolist["highsinglesranking"] + "]] (" +
-                                    str(highsinglesrankingdate.strftime("%#d. %B %Y")) + ")")
-                    else:
-                        infobox.add("HoechsteEinzelPlatzierung", self.__infolist["highsinglesranking"] + " (" +
-                                    str(highsinglesrankingdate.strftime("%#d. %B %Y")) + ")")
-                    infobox.add("AktuelleEinzelPlatzierung", self.__infolist["singlesranking"])
-                    infobox.add("DoppelBilanz", self.__infolist["doublesrecord"].replace("-", ":"))
-                    infobox.add("AnzahlDoppelTitel", self.__infolist["doublestitles"])
-                    highdoublesrankingdate = datetime.strptime(self.__infolist["highdoublesrankingdate"], "%Y-%m-%d")
-                    if self.__infolist["highdoublesranking"] == "1":
-                        infobox.add("HoechsteDoppelPlatzierung",
-                                    "[[Liste der Weltranglistenersten im Herrentennis (Doppel)|" +
-                                    self.__infolist["highdoublesranking"] + "]] (" +
-                                    str(highdoublesrankingdate.strftime("%#d. %B %Y")) + ")")
-                    else:
-                        infobox.add("HoechsteDoppelPlatzierung", self.__infolist["highdoublesranking"] + " (" +
-                                    str(highdoublesrankingdate.strftime("%#d. %B %Y")) + ")")
-                    infobox.add("AktuelleDoppelPlatzierung", self.__infolist["doublesranking"])
-                    updated = datetime.strptime(self.__infolist["updated"], "%Y-%m-%d")
-                    infobox.add("Updated", str(updated.strftime("%#d. %B %Y")))
-                    infoboxreturn = infobox
+        # text      = wikitext of the article, only its lead section is fetched if None
+        # fields    = names of the parameters to update, e.g. only the current rankings, all if None
+        # lead      = lead section of the article if text is None, e.g. loaded in bulk by preloadLeads
+        if text is None and lead is None:
+            with metrics.timer("article"):
+                lead = getLead(self.__language, self.__site, self.__wdinfo["sitelink"])
+        with metrics.timer("render"):
+            name = str(self.getTemplate().name).strip()
+            params = self.updateParams(fields)
+            # The infobox is at the top, the rest of the article is only parsed if it is not in the lead section
+            infoboxreturn = self.__setParams(leadSection(text) if text is not None else lead, name, params)
+        if infoboxreturn is None:
+            if text is None:
+                with metrics.timer("article"):
+                    text = getArticle(self.__language, self.__site, self.__wdinfo["sitelink"])
+            with metrics.timer("render"):
+                infoboxreturn = self.__setParams(text, name, params)
+        if infoboxreturn is None:
+            raise ValueError("No " + name + " in " + self.__wdinfo["sitelink"])
+        return infoboxreturn
+
+    def __setParams(self, text, name, params):
+        # Method that sets the params in the infobox of the wikitext and returns it, None if there is none
+        infoboxreturn = None
+        for infobox in mwparserfromhell.parse(text).filter_templates():
+            if infobox.name.matches(name):
+                currentparams = infoboxParams(infobox)
+                for param, value in params:
+                    infobox.add(param, value)
+                self.__changed = infoboxParams(infobox) != currentparams
+                infoboxreturn = infobox
         return infoboxreturn
 
     # Access of private variables
     language = property(getLanguage)
     site = property(getSite)
+    changed = property(getChanged)
+
+
+# Parameters that change with every scrape and are ignored when comparing infoboxes
+infobox_ignored = {"Updated"}
+
+
+def infoboxParams(infobox):
+    # Function that returns the parameters of an infobox as dictionary, ignoring whitespace, order and empty values
+    # infobox   = mwparserfromhell template or wikitext containing the infobox as first template
+    if not isinstance(infobox, mwparserfromhell.nodes.Template):
+        templates = mwparserfromhell.parse(str(infobox)).filter_templates(recursive=False)
+        if not templates:
+            return {}
+        infobox = templates[0]
+    params = {}
+    for param in infobox.params:
+        name = str(param.name).strip()
+        value = " ".join(str(param.value).split())
+        if value and name not in infobox_ignored:
+            params[name] = value
+    return params
+
+
+def sameInfobox(infobox, other):
+    # Function that returns whether two infoboxes have the same parameters
+    return infoboxParams(infobox) == infoboxParams(other)
+
+
+def leadSection(text):
+    # Function that returns the wikitext before the first section heading
+    match = re.search(r"^=+[^=\n].*=+[ \t]*$", text, re.M)
+    return text[:match.start()] if match else text
+
+
+def getLead(language, site, title):
+    # Function that fetches the lead section of one article
+    lead = preloadLeads(language, site, [title]).get(title)
+    if lead is None:
+        raise ValueError("No article " + title + " in " + language + "." + site)
+    return lead
+
+
+def getArticle(language, site, title):
+    # Function that fetches the full wikitext of one article
+    return getPage(wikisessions.getSite(language, site, login=False), title).get()
+
+
+def preloadLeads(language, site, titles, chunksize=50):
+    # Function that reads the lead sections (section 0) of many articles with one API request per chunk and returns
+    # them as {title: wikitext}, missing articles are left out
+    # titles    = article titles, e.g. the sitelinks of Wikidataresolver
+    # chunksize = titles per request, 50 is the API limit for page contents without bot rights
+    wiki = wikisessions.getSite(language, site, login=False)
+    titles = list(dict.fromkeys(title for title in titles if title))
+    leads = {}
+    if isinstance(wiki, Localsite):
+        # Dry run, the articles are read from the local wiki
+        for title in titles:
+            page = wiki.getPage(title)
+            if page.exists():
+                leads[title] = leadSection(page.get())
+        return leads
+    from pywikibot.data import api
+    for i in range(0, len(titles), chunksize):
+        chunk = titles[i:i + chunksize]
+        parameters = {"action": "query", "prop": "revisions", "rvprop": "content", "rvslots": "main",
+                      "rvsection": "0", "titles": chunk, "formatversion": "2"}
+        while True:
+            data = api.Request(site=wiki, parameters=dict(parameters)).submit()
+            # Titles come back normalized, e.g. with spaces instead of underscores
+            requested = {title: title for title in chunk}
+            for normalized in data["query"].get("normalized", []):
+                requested[normalized["to"]] = normalized["from"]
+            for page in data["query"].get("pages", []):
+                revisions = page.get("revisions")
+                if page.get("missing") or not revisions:
+                    continue
+                title = requested.get(page["title"], page["title"])
+                leads[title] = revisions[0]["slots"]["main"]["content"]
+            if "continue" not in data:
+                break
+            parameters.update(data["continue"])
+    return leads
 
 # Testing environment
 if __name__ == '__main__':
@@ -0,0 +1,132 @@
+# Name:     Wikidata bulk resolver
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Resolves many player IDs and languages to Wikidata items, labels and sitelinks with few SPARQL queries
+
+# External imports
+import urllib
+
+from SPARQLWrapper import SPARQLWrapper, JSON
+# Internal imports
+from Classes.infocache import infocache
+from Classes.metrics import metrics
+from Classes.sources import sparql_url
+
+# Wikidata properties of the player IDs of each organisation
+wdproperties = {"atp": "P536", "wta": "P597", "itf": "P599"}
+
+query_bulk = """SELECT DISTINCT ?player ?PlayerID ?language_code ?playerLabel ?enLabel ?playerlink ?atp ?wta ?itf
+    WHERE {
+    VALUES ?PlayerID { %s }
+    VALUES ?language_code { %s }
+
+    # Find the players
+    ?player wdt:%s ?PlayerID.
+
+    # Find the Wikipedia of each language and the sitelink of the player
+    BIND (URI(CONCAT("https://", ?language_code, ".wikipedia.org/")) AS ?Wikipedia)
+    OPTIONAL {
+        ?playerlink schema:about ?player.
+        ?playerlink schema:isPartOf ?Wikipedia.
+    }
+
+    # Find player's label in the language with English as fallback
+    OPTIONAL {
+        ?player rdfs:label ?playerLabel.
+        FILTER (LANG(?playerLabel) = ?language_code)
+    }
+    OPTIONAL {
+        ?player rdfs:label ?enLabel.
+        FILTER (LANG(?enLabel) = "en")
+    }
+
+    # Find the profiles on the other websites, so the fetch engine does not look them up per player
+    OPTIONAL { ?player wdt:P536 ?atp. }
+    OPTIONAL { ?player wdt:P597 ?wta. }
+    OPTIONAL { ?player wdt:P599 ?itf. }
+
+    # Select only statements without an end time
+    ?player p:P1532 ?represents_statement.
+    ?represents_statement ps:P1532 ?represents.
+    FILTER NOT EXISTS { ?represents_statement pq:P582 []. }
+    }"""
+
+
+class Wikidataresolver(object):
+    # Object that resolves (org, playerid) pairs for several languages with chunked multi-value SPARQL queries
+    # Public methods: getQueries, resolve
+
+    def __init__(self, players, languages=("de",), chunksize=200, prime=True):
+        # Self method
+        # players   = list of (org, playerid) pairs, org includes atp, wta, itf
+        # languages = list of Wikimedia language codes
+        # chunksize = maximum number of player IDs per query
+        # prime     = store the results in the infocache, so Playerinfo.wdinfo does not query again
+        self.__players = [(org, playerid.upper()) for org, playerid in players]
+        self.__languages = list(languages)
+        self.__chunksize = chunksize
+        self.__prime = prime
+        self.__endpoint_url = sparql_url
+        self.__useragent = "wikitennisbot/0.1 (https://wikitennisbot.toolforge.org)"
+        self.__queries = 0
+
+    def getQueries(self):
+        # Method that returns the number of SPARQL round trips of the last resolve
+        return self.__queries
+
+    def resolve(self):
+        # Method that returns a dictionary {(org, playerid, language): {"item", "sitelink", "sitelabel", "profiles"}}
+        # Players that cannot be found return empty strings, as Playerinfo.wdinfo does, profiles are the IDs
+        # {org: playerid} of the player on all websites
+        self.__queries = 0
+        wdinfo = {}
+        for (org, playerid) in self.__players:
+            for language in self.__languages:
+                wdinfo[(org, playerid, language)] = {"item": "", "sitelink": "", "sitelabel": "", "profiles": {}}
+        for org, prop in wdproperties.items():
+            playerids = sorted(set(playerid for o, playerid in self.__players if o == org))
+            for i in range(0, len(playerids), self.__chunksize):
+                chunk = playerids[i:i + self.__chunksize]
+                for binding in self.__query(chunk, prop):
+                    key = (org, binding["PlayerID"]["value"], binding["language_code"]["value"])
+                    if key not in wdinfo:
+                        continue
+                    info = wdinfo[key]
+                    info["item"] = binding["player"]["value"].split('entity/')[1]
+                    info["profiles"].setdefault(org, key[1])
+                    for other in wdproperties:
+                        if other in binding:
+                            info["profiles"].setdefault(other, binding[other]["value"].upper())
+                    if "playerlink" in binding and not info["sitelink"]:
+                        info["sitelink"] = urllib.parse.unquote(binding["playerlink"]["value"].split('wiki/')[1])
+                    if "playerLabel" in binding:
+                        info["sitelabel"] = binding["playerLabel"]["value"]
+                    elif "enLabel" in binding and not info["sitelabel"]:
+                        info["sitelabel"] = binding["enLabel"]["value"]
+        if self.__prime:
+            for (org, playerid, language), info in wdinfo.items():
+                if info["item"]:
+                    infocache.set(("wdinfo", org, playerid, language), info)
+        return wdinfo
+
+    def __query(self, playerids, prop):
+        # Method that runs one SPARQL query for a chunk of player IDs and all languages
+        values = " ".join('"' + playerid.replace('"', '') + '"' for playerid in playerids)
+        languages = " ".join('"' + language + '"' for language in self.__languages)
+        sparql = SPARQLWrapper(self.__endpoint_url, agent=self.__useragent)
+        sparql.setMethod('POST')
+        sparql.setQuery(query_bulk % (values, languages, prop))
+        sparql.setReturnFormat(JSON)
+        self.__queries += 1
+        with metrics.timer("sparql"):
+            return sparql.query().convert()["results"]["bindings"]
+
+    # Access of private variables
+    queries = property(getQueries)
+
+
+# Testing environment
+if __name__ == '__main__':
+    a = Wikidataresolver([("atp", "N409"), ("atp", "F324"), ("atp", "MC10")], ["de", "en"])
+    print(a.resolve())
+    print(a.queries)
@@ -1,132 +1,247 @@
-# Name:     Wiki editor
-# Author:   Mad_melone (https://w.wiki/gDR)
-# Date:     24-10-2020
-# Content:  Edits wiki code in various Wikipedia languages and Wikidata
-
-# External imports
-import pywikibot
-# Internal imports
-from Classes.webscrape import Playerinfo
-from Classes.wikicode import Infobox
-
-
-class Wikicode(object):
-    # Object that edits wiki code in Wikipedia and Wikidata
-    # Public methods: getLanguage, getSite, editWiki
-
-    def __init__(self, action, playerid, org="atp", language="de", site="wikipedia"):
-        # Self method
-        # action    = action used to edit, includes createInfoxbox, updateInfobox
-        # playerid  = identifier used by the respective org on their website to identify players
-        # language  = wikipedia language code for the site to be edited
-        # site      = wikipedia site to be edit, includes wikipedia, wikidata
-        self.__action = action
-        self.__playerid = playerid
-        self.__org = org
-        self.__language = language
-        self.__site = site
-
-    def getPlayerID(self):
-        # Method that returns the private playerid as public
-        return self.__playerid
-
-    def getOrg(self):
-        # Method that returns the private org as public
-        return self.__org
-
-    def getLanguage(self):
-        # Method that returns the private language as public
-        return self.__language
-
-    def getSite(self):
-        # Method that returns the private site as public
-        return self.__site
-
-    def createWiki(self):
-        # Method that selects whether Wikipedia or Wikidata is to be edited
-        if self.__action == "createInfobox":
-            self.__savedurl = self.createInfobox()
-        elif self.__action == "updateInfobox":
-            self.__savedurl = self.updateInfobox()
-        else:
-            self.__savedurl = "error"
-        return self.__savedurl
-
-    def createInfobox(self):
-        # Method that creates a new infobox and saves it to the bot userspace in the chosen Wikipedia
-        # Build info for bot
-        self.__infolist = Playerinfo(playerid=self.__playerid, org=self.__org).infolist
-        self.__wdinfo = Playerinfo(playerid=self.__playerid, org=self.__org).wdinfo
-        self.__infobox = Infobox(infolist=self.__infolist, wdinfo=self.__wdinfo, language=self.__language,
-                                 site=self.site).createInfobox()
-        # Login bot to Wikipedia
-        wiki = pywikibot.Site(code=self.__language, fam=self.__site)
-        wiki.login()
-        # Prepare bot edit
-        if self.__language == "de":
-            self.__botuser = "Benutzer:" + wiki.user()
-        elif self.__language == "en":
-            self.__botuser = "User:" + wiki.user()
-        else:
-            pass
-        self.__savedurl = self.__botuser + "/PlayerInfobox/(create) " + self.__infolist["updated"] + " " + self.__wdinfo["sitelabel"]
-        # Edit page
-        page = pywikibot.Page(wiki, self.__savedurl)
-        page.text = self.__infobox
-        page.save("(Manual test edit) New site by " + wiki.user())
-        # Include in overview page
-        overviewurl = self.__botuser + "/PlayerInfobox"
-        page = pywikibot.Page(wiki, overviewurl)
-        text = "* [[" + self.__savedurl + "|(create) " + self.__infolist["updated"] + " " + self.__wdinfo["sitelabel"] + "]] \n" + page.get()
-        page.text = str(text)
-        page.save("(Manual test edit) Add Infobox (create) " + self.__infolist["updated"] + " " + self.__wdinfo["sitelabel"] + "by" + wiki.user())
-        self.__savedurl = "https://" + self.__language + ".wikipedia.org/wiki/" + self.__savedurl
-        return self.__savedurl
-
-    def updateInfobox(self):
-        # Method that creates a new infobox and saves it to the bot userspace in the chosen Wikipedia
-        # Build info for bot
-        self.__infolist = Playerinfo(playerid=self.__playerid, org=self.__org).infolist
-        self.__wdinfo = Playerinfo(playerid=self.__playerid, org=self.__org).wdinfo
-        self.__infobox = Infobox(infolist=self.__infolist, wdinfo=self.__wdinfo, language=self.__language,
-                                 site=self.site).updateInfobox()
-        # Login bot to Wikipedia
-        wiki = pywikibot.Site(code=self.__language, fam=self.__site)
-        wiki.login()
-        # Prepare bot edit
-        if self.__language == "de":
-            self.__botuser = "Benutzer:" + wiki.user()
-        elif self.__language == "en":
-            self.__botuser = "User:" + wiki.user()
-        else:
-            pass
-        self.__savedurl = self.__botuser + "/PlayerInfobox/(update) " + self.__infolist["updated"] + " " + self.__wdinfo["sitelabel"]
-        # Edit page
-        page = pywikibot.Page(wiki, self.__savedurl)
-        page.text = self.__infobox
-        page.save("(Manual test edit) New site by " + wiki.user())
-        # Include in overview page
-        overviewurl = self.__botuser + "/PlayerInfobox"
-        page = pywikibot.Page(wiki, overviewurl)
-        text = "* [[" + self.__savedurl + "|(update) " + self.__infolist["updated"] + " " + self.__wdinfo["sitelabel"] + "]] \n" + page.get()
-        page.text = str(text)
-        page.save("(Manual test edit) Add Infobox (update) " + self.__infolist["updated"] + " " + self.__wdinfo["sitelabel"] + "by" + wiki.user())
-        self.__savedurl = "https://" + self.__language + ".wikipedia.org/wiki/" + self.__savedurl
-        return self.__savedurl
-
-    def createWD(self):
-        # Method that edits Wikidata
-        self.__savedurl = "wikidata"
-        return self.__savedurl
-
-    # Access of private variables
-    playerid = property(getPlayerID)
-    org = property(getOrg)
-    language = property(getLanguage)
-    site = property(getSite)
-    savedurl = property(createWiki)
-
-# Testing environment
-if __name__ == '__main__':
-    a = Wikicode(action="createInfobox", playerid="MC10", org="atp", language="de", site="wikipedia")
+# Name:     Wiki editor
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     24-10-2020
+# Content:  Edits wiki code in various Wikipedia languages and Wikidata
+
+# External imports
+import re
+# Internal imports
+from Classes.metrics import metrics
+from Classes.playerstore import playerstore
+from Classes.webscrape import Playerinfo
+from Classes.wikicode import Infobox, infoboxParams, sameInfobox
+from Classes.wikisession import getPage, wikisessions
+from Classes.writescheduler import writescheduler
+
+
+# Labels of the edit actions used in page titles and summaries
+editmodes = {"createInfobox": "create", "updateInfobox": "update", "updateRankings": "rankings"}
+
+
+class Wikicode(object):
+    # Object that edits wiki code in Wikipedia and Wikidata
+    # Public methods: getLanguage, getSite, editWiki
+
+    def __init__(self, action, playerid, org="atp", language="de", site="wikipedia", progress=None, rankings=None,
+                 wdinfo=None, lead=None):
+        # Self method
+        # action    = action used to edit, includes createInfoxbox, updateInfobox, updateRankings
+        # playerid  = identifier used by the respective org on their website to identify players
+        # language  = wikipedia language code for the site to be edited
+        # site      = wikipedia site to be edit, includes wikipedia, wikidata
+        # progress  = optional callback that receives the name of each stage, e.g. for the job queue
+        # rankings  = Rankings snapshot used by updateRankings instead of scraping the player overview
+        # wdinfo    = Wikidata information of the player resolved in bulk, queried per player if None
+        # lead      = lead section of the article loaded in bulk for updates, fetched per player if None
+        self.__action = action
+        self.__playerid = playerid
+        self.__org = org
+        self.__language = language
+        self.__site = site
+        self.__savedurl = ""
+        self.__skipreason = ""
+        self.__progress = progress or (lambda stage: None)
+        self.__rankings = rankings
+        self.__wdinfo = wdinfo
+        self.__lead = lead
+
+    def getPlayerID(self):
+        # Method that returns the private playerid as public
+        return self.__playerid
+
+    def getOrg(self):
+        # Method that returns the private org as public
+        return self.__org
+
+    def getLanguage(self):
+        # Method that returns the private language as public
+        return self.__language
+
+    def getSite(self):
+        # Method that returns the private site as public
+        return self.__site
+
+    def getSkipreason(self):
+        # Method that returns why the last edit was skipped, empty if it was saved
+        return self.__skipreason
+
+    def getSavedURL(self):
+        # Method that returns the url of the last saved page without starting a new edit
+        return self.__savedurl
+
+    def createWiki(self):
+        # Method that selects whether Wikipedia or Wikidata is to be edited
+        if self.__action == "createInfobox":
+            self.__savedurl = self.createInfobox()
+        elif self.__action == "updateInfobox":
+            self.__savedurl = self.updateInfobox()
+        elif self.__action == "updateRankings":
+            self.__savedurl = self.updateRankings()
+        else:
+            self.__savedurl = "error"
+        return self.__savedurl
+
+    def createInfobox(self):
+        # Method that creates a new infobox and saves it to the bot userspace in the chosen Wikipedia
+        return self.editInfobox("create")
+
+    def updateInfobox(self):
+        # Method that creates an updated infobox and saves it to the bot userspace in the chosen Wikipedia
+        return self.editInfobox("update")
+
+    def updateRankings(self):
+        # Method that updates only the current rankings of an infobox from the ranking snapshot
+        return self.editInfobox("rankings")
+
+    def editInfobox(self, mode):
+        # Method that runs the full edit for one player: build infobox, login, save page and overview entry
+        # mode      = label of the edit used in page titles and summaries, includes create, update
+        self.buildInfobox()
+        if self.__skipreason:
+            return self.__savedurl
+        # Shared site of the bot, logged in once per process
+        self.__progress("login")
+        wiki = wikisessions.getSite(self.__language, self.__site)
+        with metrics.timer("check"):
+            published = self.checkPublished(wiki, mode)
+        if published:
+            return self.__savedurl
+        line = self.savePage(wiki, mode)
+        self.__progress("saving overview")
+        # The overview entry is written before the job reports done, a killed webservice worker would lose queued
+        # lines, entries queued by other runs in the meantime go into the same edit
+        with metrics.timer("overview"):
+            saveOverview(wiki, [line], "(Manual test edit) Add Infobox (" + mode + ") " + self.__infolist["updated"] +
+                         " " + self.__wdinfo["sitelabel"] + "by" + wiki.user(), self.__language)
+        return self.__savedurl
+
+    def buildInfobox(self):
+        # Method that scrapes the player information and builds the infobox without touching the wiki
+        self.__savedurl = ""
+        self.__skipreason = ""
+        # Build info for bot
+        self.__progress("scraping")
+        playerinfo = Playerinfo(playerid=self.__playerid, org=self.__org, language=self.__language,
+                                wdinfo=self.__wdinfo)
+        fields = None
+        if self.__action == "updateRankings":
+            # Only the rankings of the snapshot are set, the overview page of the player is not fetched
+            self.__infolist = self.__rankings.getInfolist(playerinfo.playerid)
+            fields = self.__rankings.getFields(playerinfo.playerid)
+            self.__wdinfo = playerinfo.wdinfo
+            if not self.__wdinfo["sitelink"]:
+                self.__skipreason = "No article in " + self.__language + "." + self.__site
+                return None
+        else:
+            self.__infolist = playerinfo.infolist
+            self.__wdinfo = playerinfo.wdinfo
+            playerstore.putInfolist(self.__org, playerinfo.playerid, self.__language, self.__infolist)
+        self.__progress("rendering")
+        infobox = Infobox(infolist=self.__infolist, wdinfo=self.__wdinfo, language=self.__language, site=self.site)
+        if self.__action == "createInfobox":
+            self.__infobox = infobox.createInfobox()
+        else:
+            self.__infobox = infobox.updateInfobox(fields=fields, lead=self.__lead)
+            if not infobox.changed:
+                self.__skipreason = "Infobox in " + self.__wdinfo["sitelink"] + " is already up to date"
+                # The scrape is settled, so the player leaves the changed list and the sweep waits a full tier
+                if self.__action == "updateInfobox":
+                    playerstore.putVerified(self.__org, playerinfo.playerid, self.__language)
+        return self.__infobox
+
+    def checkPublished(self, wiki, mode, overview=None):
+        # Method that compares the built infobox with the last version published on the overview page
+        # Returns True and sets the skip reason if nothing changed since then
+        # wiki      = logged in pywikibot site
+        # mode      = label of the edit used in page titles and summaries, includes create, update
+        # overview  = text of the overview page, read from the wiki if None
+        # The player store answers without reading the wiki if this bot published the infobox before
+        title = playerstore.isPublished(self.__org, self.__playerid, self.__language, infoboxParams(self.__infobox))
+        if title:
+            self.__skipreason = "Infobox unchanged since last published version " + title
+            if self.__action == "updateInfobox":
+                playerstore.putVerified(self.__org, self.__playerid, self.__language)
+            return True
+        if overview is None:
+            page = getPage(wiki, getBotuser(wiki, self.__language) + "/PlayerInfobox")
+            overview = page.get() if page.exists() else ""
+        match = re.search(r"\[\[([^|\]]+)\|\(" + re.escape(mode) + r"\) \d{4}-\d{2}-\d{2} " +
+                          re.escape(self.__wdinfo["sitelabel"]) + r"\]\]", overview)
+        if not match:
+            return False
+        page = getPage(wiki, match.group(1))
+        if page.exists() and sameInfobox(page.get(), self.__infobox):
+            self.__skipreason = "Infobox unchanged since last published version " + match.group(1)
+            if self.__action == "updateInfobox":
+                playerstore.putVerified(self.__org, self.__playerid, self.__language)
+            return True
+        return False
+
+    def savePage(self, wiki, mode):
+        # Method that saves the built infobox to the bot userspace and returns the line for the overview page
+        # wiki      = logged in pywikibot site
+        # mode      = label of the edit used in page titles and summaries, includes create, update
+        self.__botuser = getBotuser(wiki, self.__language)
+        self.__savedurl = self.__botuser + "/PlayerInfobox/(" + mode + ") " + self.__infolist["updated"] + " " + \
+                          self.__wdinfo["sitelabel"]
+        # Edit page
+        self.__progress("saving page")
+        page = getPage(wiki, self.__savedurl)
+        page.text = self.__infobox
+        with metrics.timer("save"):
+            writescheduler.save(page, "(Manual test edit) New site by " + wiki.user())
+        playerstore.putPublished(self.__org, self.__playerid, self.__language, infoboxParams(self.__infobox),
+                                 self.__savedurl)
+        line = "* [[" + self.__savedurl + "|(" + mode + ") " + self.__infolist["updated"] + " " + \
+               self.__wdinfo["sitelabel"] + "]] \n"
+        self.__savedurl = "https://" + self.__language + ".wikipedia.org/wiki/" + self.__savedurl
+        return line
+
+    def createWD(self):
+        # Method that edits Wikidata
+        self.__savedurl = "wikidata"
+        return self.__savedurl
+
+    # Access of private variables
+    playerid = property(getPlayerID)
+    org = property(getOrg)
+    language = property(getLanguage)
+    site = property(getSite)
+    savedurl = property(createWiki)
+    skipreason = property(getSkipreason)
+
+
+def runWikicode(action, playerid, org="atp", language="de", site="wikipedia", progress=None):
+    # Function that runs one Wikicode edit and returns its result as dictionary, used by the job queue
+    # The stage timings of the edit are logged as one JSON line
+    with metrics.trace("wikicode", action=action, playerid=playerid, org=org, language=language, site=site) as log:
+        wikicode = Wikicode(action=action, playerid=playerid, org=org, language=language, site=site,
+                            progress=progress)
+        savedurl = wikicode.savedurl
+        log["result"] = "skipped" if wikicode.skipreason else "saved"
+    metrics.count("edits_" + log["result"])
+    return {"savedurl": savedurl, "skipreason": wikicode.skipreason}
+
+
+def getBotuser(wiki, language):
+    # Function that returns the userspace prefix of the logged in bot depending on the language
+    if language == "de":
+        return "Benutzer:" + wiki.user()
+    return "User:" + wiki.user()
+
+
+def saveOverview(wiki, lines, summary, language="de", flush=True):
+    # Function that prepends the given lines to the PlayerInfobox overview page with a single edit
+    # wiki      = logged in pywikibot site
+    # lines     = list of overview lines as returned by Wikicode.savePage
+    # summary   = edit summary for the overview page
+    # flush     = write now, otherwise the lines are coalesced with other runs and written by the write scheduler
+    overviewurl = getBotuser(wiki, language) + "/PlayerInfobox"
+    writescheduler.queueLines(wiki, overviewurl, lines, summary)
+    if flush:
+        writescheduler.flush()
+
+# Testing environment
+if __name__ == '__main__':
+    a = Wikicode(action="createInfobox", playerid="MC10", org="atp", language="de", site="wikipedia")
     print(a.savedurl)
\ No newline at end of file
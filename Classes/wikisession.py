@@ -0,0 +1,108 @@
+# Name:     Wiki sessions
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Shares one logged in pywikibot site per language and family across requests, batch workers and bots
+
+# External imports
+import threading
+
+# Internal imports
+from Classes.localwiki import Localsite, localwiki
+from Classes.metrics import metrics
+
+# API error codes after which the session is renewed: expired tokens and lost logins
+session_errors = {"badtoken", "assertuserfailed", "assertbotfailed", "notloggedin"}
+
+
+class Wikisessions(object):
+    # Object that logs in once per (language, family) and renews the login only when the wiki rejects it
+    # Public methods: getStats, getSite, relogin, clear
+
+    def __init__(self):
+        # Self method
+        self.__sites = {}
+        self.__loggedin = set()
+        self.__locks = {}
+        self.__lock = threading.Lock()
+        self.__stats = {"sites": 0, "logins": 0, "relogins": 0, "reused": 0}
+
+    def getStats(self):
+        # Method that returns counters of created sites, logins, renewed logins and reused sessions
+        with self.__lock:
+            return dict(self.__stats)
+
+    def getSite(self, language="de", family="wikipedia", login=True):
+        # Method that returns the shared site of language and family, logged in on first use
+        # language  = wiki language code, e.g. de, wikidata, test
+        # family    = wiki family, includes wikipedia, wikidata
+        # login     = log in if not done yet, False for read-only use
+        key = (language, family)
+        with self.__lock:
+            lock = self.__locks.setdefault(key, threading.Lock())
+        # Only the first caller of a site pays for siteinfo and login, the others wait for it
+        with lock:
+            site = self.__sites.get(key)
+            if site is None:
+                if localwiki is not None:
+                    # Dry run, pages and items are read from and saved to the local wiki
+                    site = localwiki.getSite(language, family)
+                else:
+                    # Imported on first use, so the webservice starts without the editing stack
+                    import pywikibot
+                    site = pywikibot.Site(code=language, fam=family)
+                self.__sites[key] = site
+                self.__count("sites")
+            elif not login or key in self.__loggedin:
+                self.__count("reused")
+            if login and key not in self.__loggedin:
+                with metrics.timer("login"):
+                    site.login()
+                self.__loggedin.add(key)
+                self.__count("logins")
+        return site
+
+    def relogin(self, site):
+        # Method that drops the tokens and login state of a site and logs in again
+        # site      = pywikibot site returned by getSite
+        key = (site.code, site.family.name)
+        with self.__lock:
+            lock = self.__locks.setdefault(key, threading.Lock())
+        with lock:
+            site.tokens.clear()
+            with metrics.timer("login"):
+                site._relogin()
+            self.__loggedin.add(key)
+            self.__count("relogins")
+        return site
+
+    def clear(self):
+        # Method that forgets all sites, the next getSite logs in again
+        with self.__lock:
+            self.__sites.clear()
+            self.__loggedin.clear()
+
+    def __count(self, name):
+        # Method that increases a counter of the stats
+        with self.__lock:
+            self.__stats[name] += 1
+
+    # Access of private variables
+    stats = property(getStats)
+
+
+def getPage(site, title):
+    # Function that returns the page of a title on a site of getSite, a local page in dry runs
+    if isinstance(site, Localsite):
+        return site.getPage(title)
+    import pywikibot
+    return pywikibot.Page(site, title)
+
+
+# Process-wide sessions shared by the webservice, batch runs and bots
+wikisessions = Wikisessions()
+
+# Testing environment
+if __name__ == '__main__':
+    a = wikisessions.getSite("de", "wikipedia")
+    b = wikisessions.getSite("de", "wikipedia")
+    print(a is b, a.user(), wikisessions.stats)
@@ -0,0 +1,259 @@
+# Name:     Write scheduler
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Paces all wiki writes by server lag and rate limits and coalesces log and overview page updates
+
+# External imports
+import atexit
+import json
+import os
+import threading
+import time
+
+# Internal imports
+from Classes.localwiki import Localsite
+from Classes.metrics import metrics, logger
+from Classes.wikisession import getPage, session_errors, wikisessions
+
+
+class Writescheduler(object):
+    # Object that adapts the write rate to maxlag and rate limit errors and batches prepends to log/overview pages
+    # Public methods: getInterval, getStats, write, save, measureLag, queueLines, flush
+
+    def __init__(self, interval=10.0, mininterval=2.0, maxinterval=300.0, maxlag=5, retries=5, flushminutes=10):
+        # Self method
+        # interval      = initial seconds between two writes to the same site
+        # mininterval   = fastest allowed write interval in seconds
+        # maxinterval   = slowest write interval in seconds
+        # maxlag        = replication lag in seconds above which writes are slowed down
+        # retries       = number of retries of a write after lag or rate limit errors
+        # flushminutes  = minutes after which queued log/overview lines are written
+        self.__interval = interval
+        self.__mininterval = mininterval
+        self.__maxinterval = maxinterval
+        self.__maxlag = maxlag
+        self.__retries = retries
+        self.__flushinterval = flushminutes * 60
+        self.__lock = threading.RLock()
+        self.__pending = {}
+        self.__timer = None
+        self.__lagchecked = 0.0
+        self.__stats = {"writes": 0, "retries": 0, "lag_errors": 0, "ratelimit_errors": 0, "flushes": 0,
+                        "flush_errors": 0, "coalesced_lines": 0, "lag": 0.0}
+
+    def getInterval(self):
+        # Method that returns the current write interval in seconds
+        return self.__interval
+
+    def getStats(self):
+        # Method that returns counters of writes, retries and coalesced lines
+        with self.__lock:
+            return dict(self.__stats, interval=self.__interval, pending_pages=len(self.__pending))
+
+    def write(self, site, function, *args, **kwargs):
+        # Method that runs a write function (page.save, item.editEntity, ...) paced by the current interval,
+        # retries it after lag and rate limit errors and adjusts the interval to the answer of the server
+        # Local sites of dry runs are written at once, without lag checks and put throttle
+        # Imported on first use, so the webservice starts without the editing stack
+        import pywikibot
+        local = isinstance(site, Localsite)
+        if not local:
+            self.measureLag(site)
+        for attempt in range(self.__retries + 1):
+            # pywikibot waits for the put throttle of the site before each write, absolute delays would also cap the
+            # write delay at the read delay, so only the upper bound is raised to the slowest interval
+            if not local:
+                site.throttle.maxdelay = max(site.throttle.maxdelay, self.__maxinterval)
+                site.throttle.set_delays(writedelay=self.__interval)
+            try:
+                result = function(*args, **kwargs)
+            except pywikibot.exceptions.Error as e:
+                error = saveError(e)
+                if isinstance(error, pywikibot.exceptions.MaxlagTimeoutError):
+                    self.__slowdown("lag_errors", attempt)
+                    continue
+                if not isinstance(error, pywikibot.exceptions.APIError):
+                    raise
+                if error.code == "maxlag":
+                    self.__slowdown("lag_errors", attempt, retryAfter(error))
+                    continue
+                if error.code == "ratelimited":
+                    self.__slowdown("ratelimit_errors", attempt, retryAfter(error))
+                    continue
+                if error.code in session_errors:
+                    # Token or login expired, renew the shared session and write again
+                    wikisessions.relogin(site)
+                    continue
+                raise
+            with self.__lock:
+                self.__stats["writes"] += 1
+                # Speed up slowly while the server accepts writes
+                self.__interval = max(self.__mininterval, self.__interval * 0.9)
+            return result
+        raise pywikibot.exceptions.MaxlagTimeoutError("Write failed after " + str(self.__retries) + " retries")
+
+    def save(self, page, summary, **kwargs):
+        # Method that saves a page through write
+        return self.write(page.site, page.save, summary, **kwargs)
+
+    def measureLag(self, site, every=60):
+        # Method that reads the replication lag of the site at most every few seconds and slows down if too high
+        now = time.monotonic()
+        if now - self.__lagchecked < every:
+            return self.__stats["lag"]
+        self.__lagchecked = now
+        from pywikibot.data import api
+        try:
+            data = api.Request(site=site, parameters={"action": "query", "meta": "siteinfo",
+                                                      "siprop": "dbrepllag"}).submit()
+            lag = float(data["query"]["dbrepllag"][0]["lag"])
+        except Exception:
+            return self.__stats["lag"]
+        with self.__lock:
+            self.__stats["lag"] = lag
+            if lag > self.__maxlag:
+                self.__interval = min(self.__maxinterval, self.__interval * 2)
+        return lag
+
+    def queueLines(self, site, title, lines, summary):
+        # Method that queues lines to be prepended to a log or overview page, written by flush
+        # site      = logged in pywikibot site
+        # title     = title of the log or overview page
+        # lines     = list of lines, the first line ends up at the top of the page
+        # summary   = edit summary for these lines
+        with self.__lock:
+            pending = self.__pending.setdefault((site, title), {"lines": [], "summaries": []})
+            pending["lines"].extend(lines)
+            pending["summaries"].append(summary)
+            self.__stats["coalesced_lines"] += len(lines)
+            self.__schedule()
+
+    def flush(self, reraise=True):
+        # Method that writes all queued lines with one edit per page, lines of failed pages are queued again
+        # reraise   = raise the first failure after all pages were tried, False only logs it (timer and exit)
+        with self.__lock:
+            pending = self.__pending
+            self.__pending = {}
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+        failure = None
+        for (site, title), entry in pending.items():
+            summaries = entry["summaries"]
+            summary = summaries[0] if len(summaries) == 1 else \
+                summaries[0] + " (+" + str(len(summaries) - 1) + " more)"
+            try:
+                page = getPage(site, title)
+                self.write(site, self.__prepend, page, "".join(entry["lines"]), summary)
+            except Exception as e:
+                self.__requeue(site, title, entry)
+                metrics.error("flush", e)
+                logger.warning(json.dumps({"event": "flush_failed", "title": title, "lines": len(entry["lines"]),
+                                           "error": repr(e)}))
+                failure = failure or e
+                continue
+            with self.__lock:
+                self.__stats["flushes"] += 1
+        if failure is not None and reraise:
+            raise failure
+
+    def __requeue(self, site, title, entry):
+        # Method that puts the lines of a failed flush back in front of the lines queued since then
+        with self.__lock:
+            pending = self.__pending.setdefault((site, title), {"lines": [], "summaries": []})
+            pending["lines"][:0] = entry["lines"]
+            pending["summaries"][:0] = entry["summaries"]
+            self.__stats["flush_errors"] += 1
+            self.__schedule()
+
+    def __schedule(self):
+        # Method that starts the flush timer if it is not running, the lock is held by the caller
+        if self.__timer is None and self.__flushinterval > 0:
+            self.__timer = threading.Timer(self.__flushinterval, self.flush, kwargs={"reraise": False})
+            self.__timer.daemon = True
+            self.__timer.start()
+
+    def __prepend(self, page, text, summary):
+        # Method that reads the newest page text and saves it with text on top
+        current = page.get(force=True) if page.exists() else ""
+        page.text = text + current
+        page.save(summary)
+
+    def __slowdown(self, counter, attempt, retryafter=0.0):
+        # Method that doubles the interval after a lag or rate limit error and waits before the retry
+        # retryafter    = seconds the server asked to wait, the growing backoff is only used without this hint
+        with self.__lock:
+            self.__stats[counter] += 1
+            self.__stats["retries"] += 1
+            self.__interval = min(self.__maxinterval, self.__interval * 2)
+            wait = retryafter or self.__interval * (attempt + 1)
+        time.sleep(min(wait, self.__maxinterval))
+
+    # Access of private variables
+    interval = property(getInterval)
+    stats = property(getStats)
+
+
+def saveError(error):
+    # Function that returns the error that made a write fail
+    # page.save and item.editEntity wrap API errors in OtherPageSaveError, the original error is its reason
+    reason = getattr(error, "reason", None)
+    return reason if isinstance(reason, Exception) else error
+
+
+def retryAfter(error):
+    # Function that returns the seconds the server asked to wait before the next write, 0 if it gave no hint
+    # pywikibot resets the Retry-After header of the site throttle before the error gets here, so only the details
+    # of the error answer are read, maxlag errors name the current lag
+    # error     = pywikibot APIError of the failed write
+    seconds = 0.0
+    other = getattr(error, "other", {}) or {}
+    for name in ("retry-after", "retryafter", "lag"):
+        try:
+            seconds = max(seconds, float(other.get(name) or 0))
+        except (TypeError, ValueError):
+            continue
+    return seconds
+
+
+# Process-wide scheduler shared by the webservice, batch runs and bots, queued lines are flushed on exit
+writescheduler = Writescheduler(flushminutes=float(os.environ.get("WIKITENNISBOT_FLUSH_MINUTES") or 10))
+atexit.register(writescheduler.flush, False)
+
+# Testing environment: python -m Classes.writescheduler retries writes that fail through the pywikibot save decorator
+if __name__ == '__main__':
+    import pywikibot
+    from pywikibot.page._decorators import allow_asynchronous
+    from pywikibot.throttle import Throttle
+
+    class Testsite(object):
+        # Object that stands in for a site, its lag is never measured because every query fails
+        throttle = Throttle("test:wikidata")
+
+    class Testpage(object):
+        # Object whose save fails with the given API errors first, decorated like pywikibot.Page.save
+        def __init__(self, codes):
+            self.codes = list(codes)
+            self.saves = 0
+
+        def title(self, as_link=False):
+            return "[[Test]]"
+
+        @allow_asynchronous
+        def save(self, summary):
+            self.saves += 1
+            if self.codes:
+                raise pywikibot.exceptions.APIError(self.codes.pop(0), "Test error", lag="0.01")
+
+    a = Writescheduler(interval=0.01, mininterval=0.01, maxinterval=0.02, flushminutes=0)
+    page = Testpage(["ratelimited", "maxlag"])
+    a.write(Testsite(), page.save, "Test edit")
+    stats = a.stats
+    assert page.saves == 3 and stats["ratelimit_errors"] == 1 and stats["lag_errors"] == 1, stats
+    try:
+        a.write(Testsite(), Testpage(["badvalue"]).save, "Test edit")
+    except pywikibot.exceptions.OtherPageSaveError as e:
+        assert e.reason.code == "badvalue"
+    else:
+        raise AssertionError("badvalue was retried")
+    print(a.stats)
@@ -4,19 +4,49 @@
 # Content:  Provides a webservice for WikiTennisBot
 
 # External imports
+import json
+import logging
 import os
-from flask import Flask, render_template, request, redirect, url_for
-import pywikibot
+import time
+from flask import Flask, render_template, request, redirect, url_for, jsonify, g, Response
 
-# Internal imports
-from forms import FormPlayerInfobox
-from Classes.wikiedit import Wikicode
+# Internal imports, the forms and the scraping and editing stack are imported by the routes that need them
+from Classes.httpsession import sessionpool
+from Classes.infocache import infocache
+from Classes.jobqueue import jobqueue
+from Classes.metrics import metrics, logger
+from Classes.wikisession import wikisessions
 
 #Initiate Flask with config
 class Config(object):
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'MiKa200816'
 app = Flask(__name__)
 app.config.from_object(Config)
+# Structured logs, one JSON line per request and per bot run (WIKITENNISBOT_LOGLEVEL=WARNING disables them)
+logging.basicConfig(format="%(message)s")
+logger.setLevel(os.environ.get("WIKITENNISBOT_LOGLEVEL") or "INFO")
+
+@app.before_request
+def startrequest():
+    g.start = time.perf_counter()
+
+@app.after_request
+def logrequest(response):
+    # Log method, path, status and duration of every request
+    seconds = time.perf_counter() - g.start
+    metrics.count("requests")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"event": "request", "method": request.method, "path": request.path,
+                                "endpoint": request.endpoint, "status": response.status_code,
+                                "duration_ms": round(seconds * 1000, 1)}))
+    return response
+
+@app.route('/metrics')
+def metricsexport():
+    # Prometheus text format of stage timings, errors, counters and the state of caches, sessions and jobs
+    gauges = {"infocache": infocache.stats, "sessionpool": sessionpool.stats, "jobqueue": jobqueue.stats,
+              "wikisessions": wikisessions.stats}
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
 
 @app.route('/')
 def home():
@@ -28,6 +58,7 @@ def about():
 
 @app.route('/playerinfobox/', methods=['GET', 'POST'])
 def playerinfobox():
+    from forms import FormPlayerInfobox
     form = FormPlayerInfobox()
     if request.method == "POST":
         action = request.form.get("action")
@@ -41,15 +72,28 @@ def playerinfobox():
 
 @app.route('/outputplayerinfobox/', methods=['GET', 'POST'])
 def outputplayerinfobox():
-    # Get variables from form
-    action = request.args.get("action", type = str)
-    playerid = request.args.get("playerid", type = str)
-    org = request.args.get("org", type = str)
-    language = request.args.get("language", type = str)
-    site = request.args.get("site", type = str)
-    # Get saved url where the bot saved the output
-    savedurl = Wikicode(action=action, playerid=playerid, org=org, language=language, site=site).savedurl
-    return render_template("outputplayerinfobox.html", savedurl=savedurl)
+    from Classes.wikiedit import runWikicode
+    # Get variables from form (query string for the redirect, form values for direct POST requests)
+    values = request.values
+    action = values.get("action", type = str)
+    playerid = (values.get("playerid", type = str) or "").strip().upper()
+    org = values.get("org", type = str)
+    language = values.get("language", type = str)
+    site = values.get("site", type = str)
+    # Queue the bot edit, identical requests that are still running share one job
+    jobid = jobqueue.submit((action, playerid, org, language, site), runWikicode, action=action, playerid=playerid,
+                            org=org, language=language, site=site)
+    if request.method == "POST":
+        return jsonify({"jobid": jobid, "status": url_for("outputplayerinfoboxstatus", jobid=jobid)}), 202
+    return render_template("outputplayerinfobox.html", jobid=jobid)
+
+@app.route('/outputplayerinfobox/status/<jobid>')
+def outputplayerinfoboxstatus(jobid):
+    # Report progress and result of a queued bot edit
+    status = jobqueue.getStatus(jobid)
+    if status is None:
+        return jsonify({"jobid": jobid, "status": "unknown"}), 404
+    return jsonify(status)
 
 @app.route('/playerwins/')
 def playerwins():
@@ -0,0 +1,128 @@
+# Name:     Offline benchmark
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Measures the scrape, resolve, render and update stages on recorded fixtures without network access
+
+# External imports
+import argparse
+import json
+import os
+import sys
+import time
+
+# pywikibot is only imported when a wiki site is used, which the benchmark never does, so no user config is needed
+# should a stage load it
+os.environ.setdefault("PYWIKIBOT_NO_USER_CONFIG", "2")
+
+# Internal imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.atpparser import getBackend
+from Classes.webscrape import parseWikidata
+from Classes.wikicode import Infobox
+
+# Location of the recorded pages and of the stored baseline
+fixtures = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Stages in the order of a bot run
+stages = ["scrape", "resolve", "create", "update"]
+
+
+def readFixture(name):
+    # Function that returns the content of a fixture as text
+    with open(os.path.join(fixtures, name), encoding="utf-8") as fixture_file:
+        return fixture_file.read()
+
+
+def playerVariants(count):
+    # Function that derives count distinct players from the Rafael Nadal fixtures
+    # Every player gets its own ranking, record, name and Wikidata item, so no stage can reuse earlier results
+    html = readFixture("atp_N409_overview.html")
+    sparql = readFixture("wikidata_N409_de.json")
+    article = readFixture("dewiki_Rafael_Nadal.wikitext")
+    players = []
+    for i in range(count):
+        name = "Rafael" + str(i)
+        players.append({
+            "html": html.replace('data-singles="2" data-doubles="453"',
+                                 'data-singles="' + str(i + 1) + '" data-doubles="' + str(i + 100) + '"')
+                        .replace('data-singles="999-201"', 'data-singles="' + str(500 + i) + '-201"')
+                        .replace("            Rafael\n", "            " + name + "\n").encode("utf-8"),
+            "sparql": sparql.replace("Q10132", "Q" + str(10132 + i)).replace("Rafael", name),
+            "article": article.replace("| AktuelleEinzelPlatzierung    = 2",
+                                       "| AktuelleEinzelPlatzierung    = " + str(i + 2))})
+    return players
+
+
+def runStages(players, parser=None):
+    # Function that runs every stage over all players and returns {stage: seconds}
+    # parser    = HTML parser backend for the scrape stage, default as Playerinfo
+    timings = {}
+    backend = getBackend(parser)
+    start = time.perf_counter()
+    infolists = [backend.parse(player["html"]) for player in players]
+    timings["scrape"] = time.perf_counter() - start
+    start = time.perf_counter()
+    wdinfos = [parseWikidata(json.loads(player["sparql"])) for player in players]
+    timings["resolve"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for infolist, wdinfo in zip(infolists, wdinfos):
+        str(Infobox(infolist, wdinfo, "de", "wikipedia").createInfobox())
+    timings["create"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for infolist, wdinfo, player in zip(infolists, wdinfos, players):
+        str(Infobox(infolist, wdinfo, "de", "wikipedia").updateInfobox(player["article"]))
+    timings["update"] = time.perf_counter() - start
+    return timings
+
+
+def runBenchmark(count=300, repeat=1, parser=None):
+    # Function that returns the throughput in players per second of every stage, best of repeat runs
+    players = playerVariants(count)
+    best = {}
+    for i in range(repeat):
+        for stage, seconds in runStages(players, parser).items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+    return {stage: count / best[stage] for stage in stages}
+
+
+def compareBaseline(results, baseline, tolerance=0.25):
+    # Function that prints the results next to the baseline and returns the stages that got slower than tolerance
+    regressions = []
+    print("stage      players/s   ms/player    baseline   change")
+    for stage in stages:
+        line = stage.ljust(8) + str(round(results[stage], 1)).rjust(12) + str(round(1000 / results[stage], 3)).rjust(12)
+        if stage in baseline:
+            change = results[stage] / baseline[stage] - 1
+            line += str(round(baseline[stage], 1)).rjust(12) + (("%+.1f" % (change * 100)) + " %").rjust(9)
+            if change < -tolerance:
+                regressions.append(stage)
+                line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+# Testing environment: python benchmarks/benchmark.py [--players 300] [--save]
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description="Offline benchmark of the WikiTennisBot stages")
+    argparser.add_argument("--players", type=int, default=300, help="number of player variants per run")
+    argparser.add_argument("--repeat", type=int, default=1, help="runs per stage, the fastest one counts")
+    argparser.add_argument("--parser", default=None, help="HTML parser backend, includes lxml, html.parser")
+    argparser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    argparser.add_argument("--baseline", default=baseline_path, help="baseline file with players/s per stage")
+    argparser.add_argument("--save", action="store_true", help="store the results as new baseline")
+    args = argparser.parse_args()
+    results = runBenchmark(args.players, args.repeat, args.parser)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    regressions = compareBaseline(results, baseline, args.tolerance)
+    if args.save:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({stage: round(value, 1) for stage, value in results.items()}, baseline_file, indent=4)
+            baseline_file.write("\n")
+        print("Baseline saved to " + args.baseline)
+    elif regressions:
+        print("Slower than baseline: " + ", ".join(regressions))
+        sys.exit(1)
@@ -0,0 +1,167 @@
+# Name:     Dry run
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Runs many simulated players through the full batch pipeline against the fixture server and a local wiki
+#           and reports the throughput and the time spent per stage
+
+# External imports
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Internal imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fixtureserver import playerTitle, readFixture, startServer
+
+
+def simulatedPlayers(count):
+    # Function that returns count distinct ATP player IDs of simulated players
+    return [("atp", "D" + str(i).zfill(4)) for i in range(count)]
+
+
+def runSweep(players, workers=8, uptodate=0):
+    # Function that sweeps all simulated players once, the first uptodate of them already have the current infobox in
+    # their article, and returns the number of players due again right after the sweep, which should be 0
+    import mwparserfromhell
+    from Classes.localwiki import localwiki
+    from Classes.sweep import Sweep
+    from Classes.wikiedit import Wikicode
+    article = readFixture("dewiki_Rafael_Nadal.wikitext")
+    localwiki.importPages("de", "wikipedia", {playerTitle(playerid): article for org, playerid in players})
+    for org, playerid in players[:uptodate]:
+        infobox = Wikicode(action="updateInfobox", playerid=playerid, org=org, language="de").buildInfobox()
+        wikicode = mwparserfromhell.parse(article)
+        wikicode.replace(wikicode.filter_templates(recursive=False)[0], infobox)
+        localwiki.importPages("de", "wikipedia", {playerTitle(playerid): str(wikicode)})
+    sweep = Sweep(language="de", workers=workers, fetches=10 ** 9, edits=10 ** 9, rankings=False)
+    start = time.perf_counter()
+    runner = threading.Thread(target=sweep.run, kwargs={"report": 3600})
+    runner.start()
+    while sweep.stats["done"] < len(players) and runner.is_alive():
+        time.sleep(0.1)
+    sweep.stop()
+    runner.join()
+    elapsed = time.perf_counter() - start
+    stats = sweep.stats
+    print("sweep: " + str(len(players)) + " players in " + str(round(elapsed, 2)) + " s, " + str(stats["saved"]) +
+          " saved, " + str(stats["skipped"]) + " skipped, " + str(stats["errors"]) + " errors")
+    # A restarted sweep schedules the players by their last settled scrape, up to date players are not due either
+    restarted = Sweep(language="de", rankings=False)
+    restarted.enumerate()
+    due = restarted.stats["due"]
+    print("Due after a restart: " + str(due) + " of " + str(len(players)) + " (" + str(uptodate) + " up to date)")
+    return due
+
+
+def runItems(count, uptodate=0, show=0):
+    # Function that runs the update stage of the ITF bot for count resolved items against the local Wikidata, the
+    # first uptodate of them already have the new ITF ID, and prints the throughput and the recorded edits
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bots",
+                                    "ITF property change"))
+    from bot import ITFProperty
+    from Classes.localwiki import localwiki
+    qids = {"Q9" + str(i).zfill(5): (str(100000000 + i), "player-" + str(i) + "/" + str(800000000 + i) + "/esp")
+            for i in range(count)}
+    localwiki.importItems("test", "wikidata", {qid: {"P599": itf_old, "P8618": itf_new}
+                                               for qid, (itf_old, itf_new) in list(qids.items())[:uptodate]})
+    # The checkpoint of the bot is written to a temporary working directory
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            bot = ITFProperty(action="test", store=":memory:")
+            store = bot._ITFProperty__store
+            store.putItems([(qid, "Player " + qid, itf_old) for qid, (itf_old, itf_new) in qids.items()])
+            for qid, (itf_old, itf_new) in qids.items():
+                store.setResolved(qid, itf_new)
+            start = time.perf_counter()
+            bot.updateWikidata()
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(workdir)
+    edits = [edit for edit in localwiki.listEdits("test") if edit["title"].startswith("Q")]
+    print("updateWikidata: " + str(count) + " items in " + str(round(elapsed, 2)) + " s, " +
+          str(round(count / elapsed, 1)) + " items/s, " + str(len(edits)) + " item edits, " + str(store.counts))
+    for edit in edits[:show]:
+        print(edit["title"] + " - " + edit["summary"])
+        print(edit["diff"])
+    return edits
+
+
+def runDryrun(action, players, workers=8, show=0):
+    # Function that runs one batch and prints its throughput, the time per stage and the recorded edits
+    # The Classes modules read their configuration on import, so they are imported after the environment is set
+    from Classes.infocache import infocache
+    from Classes.localwiki import localwiki
+    from Classes.metrics import metrics
+    from Classes.rankings import Rankings
+    from Classes.wikibatch import Wikibatch
+    rankings = None
+    if action == "updateRankings":
+        rankings = Rankings()
+        players = rankings.players[:len(players)]
+    if action != "createInfobox":
+        article = readFixture("dewiki_Rafael_Nadal.wikitext")
+        localwiki.importPages("de", "wikipedia", {playerTitle(playerid): article for org, playerid in players})
+    start = time.perf_counter()
+    results = Wikibatch(action, players, language="de", site="wikipedia", workers=workers,
+                        rankings=rankings).runBatch()
+    elapsed = time.perf_counter() - start
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    print(action + ": " + str(len(players)) + " players in " + str(round(elapsed, 2)) + " s, " +
+          str(round(len(players) / elapsed, 1)) + " players/s, " + str(statuses))
+    print("stage        count     total s     mean ms      max ms")
+    for stage, (count, seconds, maximum) in sorted(metrics.stats["timers"].items(), key=lambda timer: -timer[1][1]):
+        print(stage.ljust(10) + str(count).rjust(8) + str(round(seconds, 2)).rjust(12) +
+              str(round(seconds / count * 1000, 2)).rjust(12) + str(round(maximum * 1000, 2)).rjust(12))
+    for stage, count in metrics.stats["errors"].items():
+        print("error " + stage + ": " + str(count))
+    # Batches hand the resolved Wikidata information to the jobs, the infocache only holds the scrapes
+    print("Infocache: " + str(infocache.stats))
+    edits = localwiki.listEdits()
+    print("Local wiki: " + str(localwiki.counts) + ", " + str(len(edits)) + " edits recorded")
+    for edit in edits[:show]:
+        print(edit["title"] + " - " + edit["summary"])
+        print(edit["diff"])
+    return results
+
+
+# Testing environment: python benchmarks/dryrun.py [--players 1000] [--action updateInfobox] [--latency 0.05]
+# The sweep action fails if players are due again right after they were swept, e.g. --action sweep --uptodate 10
+# The items action runs the update stage of the ITF bot against the local Wikidata, e.g. --action items --uptodate 10
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description="Offline dry run of the WikiTennisBot batch pipeline")
+    argparser.add_argument("--players", type=int, default=1000, help="number of simulated players")
+    argparser.add_argument("--action", default="updateInfobox",
+                           choices=["createInfobox", "updateInfobox", "updateRankings", "sweep", "items"])
+    argparser.add_argument("--workers", type=int, default=8)
+    argparser.add_argument("--latency", type=float, default=0.0, help="seconds every fixture answer is delayed")
+    argparser.add_argument("--wiki", default=":memory:", help="SQLite file of the local wiki, kept for inspection")
+    argparser.add_argument("--cachesize", type=int, help="results kept in the infocache, default 1024")
+    argparser.add_argument("--show", type=int, default=0, help="number of recorded diffs to print")
+    argparser.add_argument("--uptodate", type=int, default=0,
+                           help="sweep: players whose article is already current, items: items with the new ITF ID")
+    args = argparser.parse_args()
+    server = startServer(latency=args.latency)
+    # Pages go to the local wiki, scrapes and queries to the fixture server, the player store is not touched
+    os.environ.update({"PYWIKIBOT_NO_USER_CONFIG": "2", "WIKITENNISBOT_LOCALWIKI": args.wiki,
+                       "WIKITENNISBOT_PLAYERSTORE": ":memory:", "WIKITENNISBOT_ATPURL": server.url,
+                       "WIKITENNISBOT_SPARQLURL": server.url + "/sparql", "WIKITENNISBOT_LOGLEVEL": "WARNING"})
+    if args.cachesize:
+        os.environ["WIKITENNISBOT_CACHE_SIZE"] = str(args.cachesize)
+    players = simulatedPlayers(args.players)
+    if args.action == "items":
+        runItems(args.players, min(args.uptodate, args.players), args.show)
+        sys.exit(0)
+    if args.action == "sweep":
+        server.RequestHandlerClass.players = [playerid for org, playerid in players]
+        due = runSweep(players, args.workers, min(args.uptodate, args.players))
+        server.shutdown()
+        sys.exit(1 if due else 0)
+    runDryrun(args.action, players, args.workers, args.show)
+    server.shutdown()
@@ -0,0 +1,134 @@
+# Name:     Fixture server
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Serves the recorded ATP pages and synthetic Wikidata answers for any player ID, used by dry runs instead of
+#           the real websites (see Classes/sources.py)
+
+# External imports
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Location of the recorded pages
+fixtures = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def readFixture(name):
+    # Function that returns the content of a fixture as text
+    with open(os.path.join(fixtures, name), encoding="utf-8") as fixture_file:
+        return fixture_file.read()
+
+
+def playerNumber(playerid):
+    # Function that derives a stable number from a player ID, so every player gets its own ranking and item
+    return zlib.crc32(playerid.encode("utf-8")) % 100000
+
+
+def playerTitle(playerid):
+    # Function that returns the article title of a simulated player
+    return "Spieler " + playerid
+
+
+def wikidataBindings(playerids, languages):
+    # Function that returns SPARQL bindings of simulated players as Wikidataresolver and Playerinfo expect them
+    bindings = []
+    for playerid in playerids:
+        for language in languages:
+            bindings.append({
+                "player": {"type": "uri", "value": "http://www.wikidata.org/entity/Q9" + str(playerNumber(playerid))},
+                "PlayerID": {"type": "literal", "value": playerid},
+                "language_code": {"type": "literal", "value": language},
+                "playerLabel": {"type": "literal", "xml:lang": language, "value": playerTitle(playerid)},
+                "playerlink": {"type": "uri", "value": "https://" + language + ".wikipedia.org/wiki/" +
+                                                       playerTitle(playerid).replace(" ", "_")}})
+    return bindings
+
+
+class Fixturehandler(BaseHTTPRequestHandler):
+    # Object that answers ATP overview and ranking pages and SPARQL queries from the fixtures
+    # Public methods: do_GET, do_POST
+
+    overview = readFixture("atp_N409_overview.html")
+    listings = {listing: readFixture("atp_rankings_" + listing + ".html").encode("utf-8")
+                for listing in ("singles", "doubles")}
+    latency = 0.0
+    # ATP IDs of all players on the simulated Wikidata, returned by the player query of the sweep
+    players = []
+
+    def do_GET(self):
+        # Method that answers the profile and ranking pages, other pages are not found
+        path = urlparse(self.path).path
+        match = re.fullmatch(r"/en/players/[^/]+/([A-Za-z0-9]+)/overview", path)
+        if match:
+            number = playerNumber(match.group(1).upper())
+            html = self.overview.replace('data-singles="2" data-doubles="453"',
+                                         'data-singles="' + str(number % 2000 + 1) + '" data-doubles="' +
+                                         str(number % 1500 + 1) + '"')
+            return self.__answer(200, "text/html; charset=utf-8", html.encode("utf-8"))
+        match = re.fullmatch(r"/en/rankings/(singles|doubles)", path)
+        if match:
+            return self.__answer(200, "text/html; charset=utf-8", self.listings[match.group(1)])
+        return self.__answer(404, "text/plain", b"Not found")
+
+    def do_POST(self):
+        # Method that answers SPARQL queries, players listed with VALUES are found, the player query of the sweep
+        # returns all simulated players, all other queries are empty
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+        query = parse_qs(body).get("query", [""])[0]
+        playerids = re.search(r"VALUES \?PlayerID \{([^}]*)\}", query)
+        languages = re.search(r"VALUES \?language_code \{([^}]*)\}", query)
+        bindings = []
+        if playerids and languages:
+            bindings = wikidataBindings(re.findall(r'"([^"]+)"', playerids.group(1)),
+                                        re.findall(r'"([a-z-]+)"', languages.group(1)))
+        elif "?player wdt:P536 ?PlayerID" in query:
+            language = re.search(r"https://([a-z-]+)\.wikipedia\.org/", query)
+            bindings = wikidataBindings(self.players, [language.group(1) if language else "de"])
+        data = json.dumps({"head": {"vars": []}, "results": {"bindings": bindings}})
+        return self.__answer(200, "application/sparql-results+json", data.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        # Method that keeps the requests out of the benchmark output
+        return
+
+    def __answer(self, status, contenttype, content):
+        # Method that sends a response after the simulated network latency
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", contenttype)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def startServer(port=0, latency=0.0):
+    # Function that starts the fixture server in a background thread and returns it, the url is server.url
+    # port      = port on localhost, 0 picks a free one
+    # latency   = seconds every answer is delayed, e.g. 0.2 for the ATP website
+    handler = type("Fixturehandler", (Fixturehandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.url = "http://127.0.0.1:" + str(server.server_address[1])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Testing environment: python benchmarks/fixtureserver.py [--port 8765] [--latency 0.2]
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description="Fixture server for dry runs of the WikiTennisBot")
+    argparser.add_argument("--port", type=int, default=8765)
+    argparser.add_argument("--latency", type=float, default=0.0, help="seconds every answer is delayed")
+    args = argparser.parse_args()
+    server = startServer(args.port, args.latency)
+    print("WIKITENNISBOT_ATPURL=" + server.url + " WIKITENNISBOT_SPARQLURL=" + server.url + "/sparql")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
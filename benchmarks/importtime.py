@@ -0,0 +1,65 @@
+# Name:     Import time benchmark
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Measures the cold start of the webservice and checks that it does not load the scraping and editing stack
+
+# External imports
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Repository root, app.py is imported from there as on Toolforge
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only the bot routes need, none of them may be loaded by startup, / or /about/
+heavy_modules = ["pywikibot", "cloudscraper", "bs4", "lxml", "mwparserfromhell", "SPARQLWrapper", "flask_wtf",
+                 "wtforms", "requests"]
+
+# Runs in a fresh interpreter: import the app, answer / and /about/ and report times and loaded modules
+probe = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+status = [client.get("/").status_code, client.get("/about/").status_code]
+answered = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "first_response_ms": (answered - start) * 1000,
+                  "status": status, "loaded": [name for name in %r if name in sys.modules]}))
+"""
+
+
+def measureStart():
+    # Function that starts the app in a new interpreter and returns its measurements
+    env = dict(os.environ, PYWIKIBOT_NO_USER_CONFIG="2", WIKITENNISBOT_LOGLEVEL="WARNING")
+    output = subprocess.run([sys.executable, "-c", probe % heavy_modules], cwd=root, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def runBenchmark(runs=5):
+    # Function that returns the median import and first response time of several cold starts and all loaded modules
+    results = [measureStart() for i in range(runs)]
+    loaded = sorted(set(name for result in results for name in result["loaded"]))
+    median = {}
+    for key in ("import_ms", "first_response_ms"):
+        values = sorted(result[key] for result in results)
+        median[key] = values[len(values) // 2]
+    return median, loaded
+
+
+# Testing environment: python benchmarks/importtime.py [--runs 5] [--budget 400]
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description="Cold start benchmark of the WikiTennisBot webservice")
+    argparser.add_argument("--runs", type=int, default=5, help="number of cold starts, the median counts")
+    argparser.add_argument("--budget", type=float, default=400, help="allowed ms from start to the first response")
+    args = argparser.parse_args()
+    median, loaded = runBenchmark(args.runs)
+    print("import app          " + str(round(median["import_ms"], 1)).rjust(8) + " ms")
+    print("first response      " + str(round(median["first_response_ms"], 1)).rjust(8) + " ms (budget " +
+          str(args.budget) + " ms)")
+    print("heavy modules       " + (", ".join(loaded) or "none"))
+    if loaded or median["first_response_ms"] > args.budget:
+        sys.exit(1)
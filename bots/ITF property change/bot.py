@@ -6,24 +6,46 @@
 
 # Imports
 import pywikibot
+from pywikibot import pagegenerators
 from SPARQLWrapper import SPARQLWrapper, JSON
-from selenium import webdriver
-import json
 from datetime import datetime
 import os
+import argparse
+import queue
+import sys
+import threading
+
+from checkpoint import Checkpoint
+from editplanner import Editplanner
+from itemstore import Itemstore
+from resolver import Redirectresolver, itf_legacy_url
+# Shared modules of the repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from Classes.localwiki import Localsite
+from Classes.wikisession import getPage, wikisessions
+from Classes.writescheduler import writescheduler
 
 class ITFProperty(object):
     # Object that contains and edits ITF player information
-    def __init__(self, action="test"):
+    def __init__(self, action="test", baseurl=itf_legacy_url, workers=8, rate=5.0, deprecate=False, store="items.db"):
         # Self method
+        # action    = live for Wikidata, test for test.wikidata and a limited number of items
+        # baseurl   = legacy ITF profile url, can point to a local stand-in server (see standin.py)
+        # workers   = number of concurrent redirect requests
+        # rate      = maximum number of redirect requests per second and host
+        # deprecate = set the P599 statement of the old ITF ID to deprecated rank in the same edit
+        # store     = SQLite item store, existing items files can be imported with itemstore.py
         self.__action = action
-        self.__itemlist = {}
+        self.__deprecate = deprecate
+        self.__resolver = Redirectresolver(baseurl=baseurl, workers=workers, rate=rate)
+        self.__store = Itemstore(store)
         self.__endpoint_url = "https://query.wikidata.org/sparql"
         self.__useragent = "wikitennisbot/0.1 (https://wikitennisbot.toolforge.org)"
         self.__now = str(datetime.now().strftime("%Y%d%m_%H-%M-%S"))
 
-    def getItems(self):
+    def getItems(self, resume=False):
         # Method that returns all players with a value in P599 that needs to be updated
+        # resume    = skip items already resolved in checkpoint_resolve.jsonl of an interrupted run
         # Query Wikidata SPARQL (no Limit if live, Limit = 3 for tests)
         if self.__action == "live":
             query = """SELECT
@@ -51,135 +73,191 @@ class ITFProperty(object):
         sparql.setReturnFormat(JSON)
         results = sparql.query().convert()
         dic = results["results"]["bindings"]
-        # Initiate Selenium a
-        driver = webdriver.Chrome()
-        driver.get("https://www.itftennis.com/")
-        # Iterate over SPARQL results and create result dictionary
-        for i in range(len(dic)):
-            item = dic[i]["item"]["value"].split('entity/')[1]
-            itemlabel = dic[i]["itemLabel"]["value"]
-            itf_old = dic[i]["itf_old"]["value"]
-            url = "https://www.itftennis.com/procircuit/players/player/profile.aspx?playerid=" + itf_old
-            driver.get(url)
-            itf_new = driver.current_url.split("players/")[1][:-15]
-            self.__itemlist[i] = {"item": item, "itemlabel": itemlabel, "itf_old": itf_old, "itf_new": itf_new}
-            # Print progress to console
-            print(str(i+1) + "/" + str(len(dic)))
-        driver.quit()
-        # Write into file and create backup if already exists
-        if os.path.exists("items.txt"):
-            os.rename("items.txt", "items_backup_" + self.__now + ".txt")
-        with open("items.txt", "w") as outfile:
-            json.dump(self.__itemlist, outfile)
-        return self.__itemlist
-    
-    def cleanItems(self):
-        # Method that cleans up the items for errorneous IDs and creates a error.txt
-        error_data = {}
-        driver = webdriver.Chrome()
-        driver.get("https://www.itftennis.com/")
-        # Identify errors and write to
-        with open("items.txt") as item_file:
-            item_data = json.load(item_file)
-            for p in item_data:
-                if "aspx?" in item_data[p]["itf_new"]:
-                    itf_new = ""
-                    url = "https://www.itftennis.com/procircuit/players/player/profile.aspx?playerid=" + \
-                          item_data[p]["itf_old"]
-                    driver.get(url)
-                    itf_new = driver.current_url.split("players/")[1][:-15]
-                    # If "aspx?" is in the url this means an errorneous itf_old
-                    if "aspx?" in itf_new:
-                        error_data[p] = item_data[p]
-                    else:
-                        item_data[p]["itf_new"] = itf_new
-        # Delete errorneous IDs from items
-        item_set = set(item_data)
-        error_set = set(error_data)
-        error_items = item_set.intersection(error_set)
-        for item in error_items:
-            del item_data[item]
-        # Write updated items.txt after backup and new error.txt
-        if os.path.exists("items.txt"):
-            os.rename("items.txt", "items_backup_" + self.__now + ".txt")
-        with open("items.txt", "w") as item_file:
-            json.dump(item_data, item_file)
-        with open("error.txt", "w") as error_file:
-            json.dump(error_data, error_file)
+        with Checkpoint("resolve", resume) as checkpoint:
+            completed = checkpoint.completed
+            todo = {}
+            # Iterate over SPARQL results and store every item
+            for i in range(len(dic)):
+                item = dic[i]["item"]["value"].split('entity/')[1]
+                itemlabel = dic[i]["itemLabel"]["value"]
+                itf_old = dic[i]["itf_old"]["value"]
+                if item in completed and completed[item]["itf_old"] == itf_old:
+                    continue
+                todo[item] = {"item": item, "itemlabel": itemlabel, "itf_old": itf_old}
+            self.__store.putItems([(item, entry["itemlabel"], entry["itf_old"]) for item, entry in todo.items()])
+            if resume:
+                print("Resuming: " + str(len(dic) - len(todo)) + " items already resolved")
+            # Follow the redirects of the legacy profile urls concurrently, every result is stored right away
+            self.__resolver.resolveItems(todo, callback=self.__storeResult(checkpoint))
+        print(str(self.__resolver.errors) + " items failed with request errors or unexpected redirects")
+        return self.__store.counts
+
+    def cleanItems(self, resume=False, maxretries=5, backoff=3600):
+        # Method that retries only the failed items that are due, items that still fail keep the status failed
+        # and wait twice as long before the next attempt
+        # resume        = skip items already retried in checkpoint_clean.jsonl of an interrupted run
+        # maxretries    = number of failed attempts after which an item is given up
+        # backoff       = seconds to wait after the first failed attempt
+        with Checkpoint("clean", resume) as checkpoint:
+            completed = checkpoint.completed
+            retry = {}
+            for item in self.__store.iterRetries(maxretries, backoff):
+                if item["qid"] not in completed:
+                    retry[item["qid"]] = item
+            print("Retrying " + str(len(retry)) + " failed items")
+            self.__resolver.resolveItems(retry, callback=self.__storeResult(checkpoint))
+        print(str(self.__resolver.errors) + " items failed with request errors or unexpected redirects")
+        print(self.__store.counts)
 
-    def updateWikidata(self):
+    def __storeResult(self, checkpoint):
+        # Method that returns the callback writing a resolved item to the store and the checkpoint
+        def store(key, entry):
+            self.__store.setResolved(key, entry["itf_new"])
+            checkpoint.write(key, itf_old=entry["itf_old"], itf_new=entry["itf_new"])
+        return store
+
+    def updateWikidata(self, resume=False):
         # Method that updates the wikidata items
-        # Login bot to Wikidata
-        log = []
-        if self.__action == "live":
-            wiki = pywikibot.Site("wikidata", "wikidata")
-        else:
-            wiki = pywikibot.Site("test", "wikidata")
-        wiki.login()
-        repo = wiki.data_repository()
-        # Get item information
-        with open("items.txt") as item_file:
-            item_data = json.load(item_file)
-            for i in item_data:
-                print(i + " - " + item_data[i]["item"])
-                item = pywikibot.ItemPage(repo, item_data[i]["item"])
-                item.get()
-                # Bug fix: remove trailing "/"
-                if item_data[i]["itf_new"][-1:] == "/":
-                    item_data[i]["itf_new"] = item_data[i]["itf_new"][:-1]
+        # resume    = skip items already handled in checkpoint_update.jsonl of an interrupted run
+        with Checkpoint("update", resume) as checkpoint:
+            completed = checkpoint.completed
+            # Log entries of an interrupted run are kept for the log page
+            log = [record["log"] for record in completed.values() if record.get("log")]
+            # Login bot to Wikidata
+            if self.__action == "live":
+                wiki = wikisessions.getSite("wikidata", "wikidata")
+            else:
+                wiki = wikisessions.getSite("test", "wikidata")
+            repo = wiki.data_repository()
+            today = datetime.now()
+            # Drop items whose P8618 already matches before loading any entity
+            if self.__action == "live":
+                current = self.prefilterItems()
+                skipped = 0
+                for entry in self.__store.iterItems("resolved"):
+                    if current.get(entry["qid"]) == {entry["itf_new"]}:
+                        self.__store.setStatus(entry["qid"], "uptodate")
+                        skipped += 1
+                print("Skipping " + str(skipped) + " items with up-to-date P8618")
+            # Get item information, items are streamed from the store and loaded in batches
+            qids = (entry["qid"] for entry in self.__store.iterItems("resolved") if entry["qid"] not in completed)
+            for item in self.loadItems(repo, qids):
+                entry = self.__store.getItem(item.getID())
+                if entry is None:
+                    print(item.getID() + " - not in the item store (redirect?), skipped")
+                    continue
+                print(entry["qid"])
+                logged = len(log)
                 if item.claims:
-                    #if "P599" in item.claims:
-                    #    if item_data[i]["itf_old"] == item.claims["P599"][0].getTarget():
-                    #        # Set P599 statement deprecated if not already
-                    #        claim = pywikibot.Claim(repo, "P599")
-                    #        if not claim.getRank() == "deprecated":
-                    #            print(claim.getRank())
-                    #            claim.changeRank("deprecated")
-                    #            log.append("{{Q|" + item_data[i]["item"][1:] + "}} - deprecate P599")
-                    #        else:
-                    #            log.append("{{Q|" + item_data[i]["item"][1:] + "}} - no deprecate P599")
+                    # Plan all changes of the item and save them with a single edit
+                    plan = Editplanner(repo, item)
+                    target = entry["itf_new"]
+                    # The reference always names the public ITF profile, also when resolving against a stand-in server
+                    references = {"P854": itf_legacy_url + entry["itf_old"],
+                                  "P813": pywikibot.WbTime(year=today.year, month=today.month, day=today.day,
+                                                            site=repo)}
                     if not "P8618" in item.claims:
                         # Add new P8618 statement if not already available
-                        claim = pywikibot.Claim(repo, "P8618")
-                        target = item_data[i]["itf_new"]
-                        claim.setTarget(target)
-                        item.addClaim(claim, summary="Add ITF Player ID 2020 (P8618)")
-                        log.append("{{Q|" + item_data[i]["item"][1:] + "}} - add P8618")
-                    else:
-                        if item.claims["P8618"][0].getTarget() != item_data[i]["itf_new"]:
-                            # Update P8618 statement if not the same as from web scraping
-                            # 1) Delete existing statements 2) Add new statement
-                            for claim in item.claims["P8618"]:
-                                item.removeClaims(claim, summary="Removing incorrect ITF Player ID 2020 (P8618)")
-                            claim = pywikibot.Claim(repo, "P8618")
-                            target = item_data[i]["itf_new"]
-                            claim.setTarget(target)
-                            item.addClaim(claim, summary="Update ITF Player ID 2020 (P8618)")
-                            log.append("{{Q|" + item_data[i]["item"][1:] + "}} - update P8618")
-                        else:
-                            pass
-                            #log.append("{{Q|" + item_data[i]["item"][1:] + "}} - no update P8618")
+                        plan.addClaim("P8618", target, references, summary="Add ITF Player ID 2020 (P8618)")
+                    elif item.claims["P8618"][0].getTarget() != target:
+                        # Update P8618 statement if not the same as from web scraping (replaces all existing statements)
+                        plan.replaceClaims("P8618", target, references, summary="Update ITF Player ID 2020 (P8618)")
+                    if self.__deprecate:
+                        # Set P599 statement deprecated if not already
+                        plan.deprecateClaims("P599", entry["itf_old"], summary="Deprecate ITF Player ID (P599)")
+                    if writescheduler.write(repo, plan.submit):
+                        log.append("{{Q|" + entry["qid"][1:] + "}} - " + ", ".join(plan.labels))
+                self.__store.setStatus(entry["qid"], "done")
+                checkpoint.write(entry["qid"], log=log[-1] if len(log) > logged else "")
         # Write log
         self.__botuser = "User:" + wiki.user()
         instance = str(self.__now) + " ITF Property Change"
-        page = pywikibot.Page(wiki, self.__botuser + "/log/" + instance)
+        page = getPage(wiki, self.__botuser + "/log/" + instance)
         heading = "== Log for bot run on " + str(self.__now) + " ==\n\n\n* "
         content = "\n* ".join(log)
         page.text = heading + content
-        page.save("Log update by " + wiki.user())
+        writescheduler.save(page, "Log update by " + wiki.user())
 
         overviewurl = "User:WikiTennisBot/log"
-        page = pywikibot.Page(wiki, overviewurl)
-        text = "* [[User:WikiTennisBot/log/" + instance + "]] \n" + page.get()
-        page.text = str(text)
-        page.save("Log update by " + wiki.user())
+        writescheduler.queueLines(wiki, overviewurl, ["* [[User:WikiTennisBot/log/" + instance + "]] \n"],
+                                  "Log update by " + wiki.user())
+        writescheduler.flush()
+
+    def prefilterItems(self):
+        # Method that returns {qid: set of P8618 values} of all items with P599 and P8618 (one SPARQL query)
+        query = """SELECT ?item ?itf_new
+                WHERE
+                {
+                  ?item wdt:P599 [];
+                        wdt:P8618 ?itf_new.
+                }"""
+        sparql = SPARQLWrapper(self.__endpoint_url, self.__useragent)
+        sparql.setMethod('POST')
+        sparql.setQuery(query)
+        sparql.setReturnFormat(JSON)
+        results = sparql.query().convert()
+        current = {}
+        for row in results["results"]["bindings"]:
+            qid = row["item"]["value"].split('entity/')[1]
+            current.setdefault(qid, set()).add(row["itf_new"]["value"])
+        return current
+
+    def loadItems(self, repo, qids, groupsize=50):
+        # Method that yields items loaded in batches of groupsize (wbgetentities), the next batch is
+        # fetched in a background thread while the current one is processed
+        if isinstance(repo, Localsite):
+            yield from self.__loadLocalItems(repo, qids)
+            return
+        pages = (pywikibot.ItemPage(repo, qid) for qid in qids)
+        preloaded = pagegenerators.PreloadingEntityGenerator(pages, groupsize=groupsize)
+        buffer = queue.Queue(maxsize=groupsize * 2)
+
+        def produce():
+            try:
+                for page in preloaded:
+                    buffer.put(page)
+            except Exception as e:
+                buffer.put(e)
+            buffer.put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            page = buffer.get()
+            if page is None:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+
+    def __loadLocalItems(self, repo, qids):
+        # Method that yields the items of a dry run from the local wiki (WIKITENNISBOT_LOCALWIKI), items it does not
+        # know yet start with the old ITF ID of the item store, as the SPARQL query of getItems found them
+        for qid in qids:
+            item = repo.getItem(qid)
+            if not item.exists():
+                entry = self.__store.getItem(qid)
+                repo.wiki.importItems(repo.code, repo.family.name, {qid: {"P599": entry["itf_old"]}})
+            yield item
 
     # Access of private variables
     itemlist = property(getItems)
 
-# Testing environment
+# Command line interface, e.g. python bot.py update --action live --resume
 if __name__ == '__main__':
-    update = ITFProperty(action="live")
-    #update.getItems()
-    #update.cleanItems()
-    update.updateWikidata()
+    parser = argparse.ArgumentParser(description="Change ITF player IDs from P599 to P8618 in Wikidata")
+    parser.add_argument("stage", choices=["resolve", "clean", "update"])
+    parser.add_argument("--action", default="test", choices=["test", "live"])
+    parser.add_argument("--resume", action="store_true", help="skip items finished by an interrupted run")
+    parser.add_argument("--baseurl", default=itf_legacy_url, help="legacy ITF profile url, e.g. a stand-in server")
+    parser.add_argument("--deprecate", action="store_true", help="deprecate the old P599 statement in the same edit")
+    parser.add_argument("--store", default="items.db", help="SQLite item store, see itemstore.py to import items.txt")
+    parser.add_argument("--max-retries", type=int, default=5, help="clean: give up items after this many failures")
+    parser.add_argument("--backoff", type=float, default=3600, help="clean: seconds before the first retry")
+    args = parser.parse_args()
+    update = ITFProperty(action=args.action, baseurl=args.baseurl, deprecate=args.deprecate, store=args.store)
+    if args.stage == "resolve":
+        update.getItems(resume=args.resume)
+    elif args.stage == "clean":
+        update.cleanItems(resume=args.resume, maxretries=args.max_retries, backoff=args.backoff)
+    else:
+        update.updateWikidata(resume=args.resume)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Name:     Checkpoint
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Append-only JSONL checkpoint of finished items, so long bot runs can be resumed after an interruption
+
+# Imports
+import json
+import os
+import threading
+from datetime import datetime
+
+
+class Checkpoint(object):
+    # Object that appends one JSON line per finished item of a bot stage and reads them back on resume
+    # Public methods: getPath, getCompleted, write, close, also usable as context manager
+
+    def __init__(self, stage, resume=False, directory="."):
+        # Self method
+        # stage     = name of the bot stage, includes resolve, clean, update
+        # resume    = keep the existing checkpoint of the stage, otherwise it is moved to a backup and started fresh
+        # directory = directory of the checkpoint files
+        self.__path = os.path.join(directory, "checkpoint_" + stage + ".jsonl")
+        self.__lock = threading.Lock()
+        if not resume and os.path.exists(self.__path):
+            now = str(datetime.now().strftime("%Y%d%m_%H-%M-%S"))
+            os.rename(self.__path, os.path.join(directory, "checkpoint_" + stage + "_backup_" + now + ".jsonl"))
+        self.__file = open(self.__path, "a")
+
+    def getPath(self):
+        # Method that returns the private path as public
+        return self.__path
+
+    def getCompleted(self):
+        # Method that returns {key: record} of all items written so far, the latest record of a key wins
+        completed = {}
+        with open(self.__path) as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A run killed while writing leaves a partial last line
+                    continue
+                completed[record["key"]] = record
+        return completed
+
+    def write(self, key, **data):
+        # Method that appends the record of a finished item and flushes it to disk immediately
+        record = dict(data, key=key, time=datetime.now().isoformat(timespec="seconds"))
+        with self.__lock:
+            self.__file.write(json.dumps(record) + "\n")
+            self.__file.flush()
+
+    def close(self):
+        # Method that closes the checkpoint file, records written so far are already on disk
+        with self.__lock:
+            self.__file.close()
+
+    def __enter__(self):
+        # Method that returns the checkpoint for a with statement
+        return self
+
+    def __exit__(self, *exc):
+        # Method that closes the checkpoint at the end of a with statement
+        self.close()
+        return False
+
+    # Access of private variables
+    path = property(getPath)
+    completed = property(getCompleted)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# Name:     Edit planner
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Collects all claim changes of a Wikidata item and saves them with a single editEntity call
+
+# Imports
+from collections import OrderedDict
+
+import pywikibot
+
+# Datatypes of the properties used by the bots, saves one API request per property
+datatypes = {"P599": "external-id", "P8618": "external-id", "P854": "url", "P813": "time"}
+
+
+class Editplanner(object):
+    # Object that plans claim additions, replacements and deprecations of one item and submits them as one edit
+    # Public methods: getChanges, getLabels, createReferences, addClaim, replaceClaims, deprecateClaims, submit
+
+    def __init__(self, repo, item):
+        # Self method
+        # repo      = Wikidata repository of the item
+        # item      = loaded pywikibot.ItemPage
+        self.__repo = repo
+        self.__item = item
+        self.__claims = []
+        self.__summaries = []
+        self.__labels = []
+
+    def getChanges(self):
+        # Method that returns the claim JSON of all planned changes
+        return self.__claims
+
+    def getLabels(self):
+        # Method that returns short labels of the planned changes for the log, e.g. "add P8618"
+        return self.__labels
+
+    def createReferences(self, references):
+        # Method that turns {property: target} into a pywikibot source collection for a new claim
+        collection = OrderedDict()
+        for prop, target in references.items():
+            source = pywikibot.Claim(self.__repo, prop, is_reference=True, datatype=datatypes.get(prop))
+            source.setTarget(target)
+            collection[prop] = [source]
+        return collection
+
+    def addClaim(self, prop, target, references=None, summary=""):
+        # Method that plans a new claim with optional references {property: target}
+        claim = pywikibot.Claim(self.__repo, prop, datatype=datatypes.get(prop))
+        claim.setTarget(target)
+        if references:
+            claim.sources.append(self.createReferences(references))
+        self.__claims.append(claim.toJSON())
+        self.__summaries.append(summary or "Add " + prop)
+        self.__labels.append("add " + prop)
+
+    def replaceClaims(self, prop, target, references=None, summary=""):
+        # Method that plans the removal of all existing claims of prop and the addition of a new one
+        for claim in self.__item.claims.get(prop, []):
+            self.__claims.append({"id": claim.snak, "remove": ""})
+        claim = pywikibot.Claim(self.__repo, prop, datatype=datatypes.get(prop))
+        claim.setTarget(target)
+        if references:
+            claim.sources.append(self.createReferences(references))
+        self.__claims.append(claim.toJSON())
+        self.__summaries.append(summary or "Update " + prop)
+        self.__labels.append("update " + prop)
+
+    def deprecateClaims(self, prop, target=None, summary=""):
+        # Method that plans setting the claims of prop (only those with target if given) to deprecated rank
+        deprecated = False
+        for claim in self.__item.claims.get(prop, []):
+            if claim.getRank() == "deprecated" or (target is not None and claim.getTarget() != target):
+                continue
+            data = claim.toJSON()
+            data["rank"] = "deprecated"
+            self.__claims.append(data)
+            deprecated = True
+        if deprecated:
+            self.__summaries.append(summary or "Deprecate " + prop)
+            self.__labels.append("deprecate " + prop)
+
+    def submit(self):
+        # Method that saves all planned changes with one editEntity call and one summary, returns False if no changes
+        if not self.__claims:
+            return False
+        self.__item.editEntity({"claims": self.__claims}, summary="; ".join(self.__summaries))
+        return True
+
+    # Access of private variables
+    changes = property(getChanges)
+    labels = property(getLabels)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# Name:     Item store
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  SQLite store of ITF migration items keyed by QID with streaming iteration and in-place status updates
+
+# Imports
+import argparse
+import json
+import sqlite3
+import threading
+import time
+
+# Status of an item: new (not resolved yet), resolved, failed (old ID not redirected), uptodate, done
+statuses = ["new", "resolved", "failed", "uptodate", "done"]
+
+
+def normalizeITF(itf_new):
+    # Function that removes the trailing "/" of some resolved IDs
+    if itf_new and itf_new[-1:] == "/":
+        return itf_new[:-1]
+    return itf_new
+
+
+def statusOf(itf_new):
+    # Function that returns the status of a resolved ID, "aspx?" means the old ID was not redirected
+    if not itf_new:
+        return "new"
+    return "failed" if "aspx?" in itf_new else "resolved"
+
+
+class Itemstore(object):
+    # Object that keeps one row per Wikidata item, so memory and rewrite cost do not grow with the number of items
+    # Public methods: getCounts, putItems, setResolved, setStatus, getItem, iterItems, iterRetries, importFile,
+    #                 exportFile
+
+    def __init__(self, path="items.db"):
+        # Self method
+        # path      = SQLite file of the store
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__db.row_factory = sqlite3.Row
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute("""CREATE TABLE IF NOT EXISTS items (
+                                qid TEXT PRIMARY KEY, itemlabel TEXT, itf_old TEXT, itf_new TEXT,
+                                status TEXT NOT NULL DEFAULT 'new', changed TEXT)""")
+        self.__db.execute("CREATE INDEX IF NOT EXISTS items_status ON items (status, qid)")
+        # Retry bookkeeping, added to stores created before it existed
+        columns = [row[1] for row in self.__db.execute("PRAGMA table_info(items)")]
+        if "retries" not in columns:
+            self.__db.execute("ALTER TABLE items ADD COLUMN retries INTEGER NOT NULL DEFAULT 0")
+        if "lastattempt" not in columns:
+            self.__db.execute("ALTER TABLE items ADD COLUMN lastattempt REAL")
+
+    def getCounts(self):
+        # Method that returns the number of items per status
+        with self.__lock:
+            rows = self.__db.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def putItems(self, rows):
+        # Method that inserts items (qid, itemlabel, itf_old) in one transaction or resets existing ones to be resolved
+        with self.__lock:
+            self.__db.execute("BEGIN")
+            self.__db.executemany("""INSERT INTO items (qid, itemlabel, itf_old, status, changed)
+                                     VALUES (?, ?, ?, 'new', datetime('now'))
+                                     ON CONFLICT(qid) DO UPDATE SET itemlabel = excluded.itemlabel,
+                                     itf_old = excluded.itf_old, itf_new = NULL, status = 'new', retries = 0,
+                                     lastattempt = NULL, changed = excluded.changed""", rows)
+            self.__db.execute("COMMIT")
+
+    def setResolved(self, qid, itf_new):
+        # Method that stores the resolved new ITF ID of an item, sets its status to resolved or failed and
+        # records the attempt, failed attempts increase the retry count
+        itf_new = normalizeITF(itf_new)
+        status = statusOf(itf_new)
+        with self.__lock:
+            self.__db.execute("""UPDATE items SET itf_new = ?, status = ?, retries = retries + ?, lastattempt = ?,
+                                 changed = datetime('now') WHERE qid = ?""",
+                              (itf_new, status, 1 if status == "failed" else 0, time.time(), qid))
+
+    def setStatus(self, qid, status):
+        # Method that changes the status of an item in place
+        with self.__lock:
+            self.__db.execute("UPDATE items SET status = ?, changed = datetime('now') WHERE qid = ?", (status, qid))
+
+    def getItem(self, qid):
+        # Method that returns an item as dictionary or None
+        with self.__lock:
+            row = self.__db.execute("SELECT * FROM items WHERE qid = ?", (qid,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def iterItems(self, status=None, pagesize=500):
+        # Method that yields items ordered by QID page by page, status updates while iterating are safe
+        last = ""
+        while True:
+            with self.__lock:
+                if status is None:
+                    rows = self.__db.execute("SELECT * FROM items WHERE qid > ? ORDER BY qid LIMIT ?",
+                                             (last, pagesize)).fetchall()
+                else:
+                    rows = self.__db.execute("SELECT * FROM items WHERE status = ? AND qid > ? ORDER BY qid LIMIT ?",
+                                             (status, last, pagesize)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last = rows[-1]["qid"]
+
+    def iterRetries(self, maxretries=5, backoff=3600, pagesize=500):
+        # Method that yields the failed items that are due for another attempt
+        # maxretries    = items with this many failed attempts are not retried anymore
+        # backoff       = seconds to wait after the first failed attempt, doubled with every further failure
+        last = ""
+        while True:
+            with self.__lock:
+                rows = self.__db.execute("""SELECT * FROM items WHERE status = 'failed' AND qid > ? AND retries < ?
+                                            AND (lastattempt IS NULL OR lastattempt + ? * (1 << retries) <= ?)
+                                            ORDER BY qid LIMIT ?""",
+                                         (last, maxretries, backoff / 2.0, time.time(), pagesize)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last = rows[-1]["qid"]
+
+    def importFile(self, path):
+        # Method that imports an items file of the JSON format used so far, keyed by list index (with "item")
+        # or by QID, and returns the number of imported items
+        with open(path) as item_file:
+            item_data = json.load(item_file)
+        rows = []
+        for key, entry in item_data.items():
+            qid = entry.get("item", key)
+            itf_new = normalizeITF(entry.get("itf_new"))
+            rows.append((qid, entry.get("itemlabel"), entry.get("itf_old"), itf_new, statusOf(itf_new)))
+        with self.__lock:
+            self.__db.execute("BEGIN")
+            self.__db.executemany("""INSERT INTO items (qid, itemlabel, itf_old, itf_new, status, changed)
+                                     VALUES (?, ?, ?, ?, ?, datetime('now'))
+                                     ON CONFLICT(qid) DO UPDATE SET itemlabel = excluded.itemlabel,
+                                     itf_old = excluded.itf_old, itf_new = excluded.itf_new, status = excluded.status,
+                                     changed = excluded.changed""", rows)
+            self.__db.execute("COMMIT")
+        return len(rows)
+
+    def exportFile(self, path, status=None):
+        # Method that writes the items (of one status) as QID-keyed JSON file item by item
+        with open(path, "w") as item_file:
+            item_file.write("{")
+            for i, item in enumerate(self.iterItems(status)):
+                entry = {"itemlabel": item["itemlabel"], "itf_old": item["itf_old"], "itf_new": item["itf_new"]}
+                item_file.write((", " if i else "") + json.dumps(item["qid"]) + ": " + json.dumps(entry))
+            item_file.write("}")
+
+    # Access of private variables
+    counts = property(getCounts)
+
+
+# Command line interface, e.g. python itemstore.py import items_newformat.txt
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manage the item store of the ITF property change bot")
+    parser.add_argument("command", choices=["import", "export", "stats"])
+    parser.add_argument("file", nargs="?", help="JSON items file to import or export")
+    parser.add_argument("--status", choices=statuses, help="export only items with this status")
+    parser.add_argument("--store", default="items.db")
+    args = parser.parse_args()
+    store = Itemstore(args.store)
+    if args.command == "import":
+        print("Imported " + str(store.importFile(args.file)) + " items")
+    elif args.command == "export":
+        store.exportFile(args.file, args.status)
+    print(store.counts)
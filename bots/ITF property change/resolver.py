@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# Name:     ITF redirect resolver
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Follows the redirects of legacy ITF profile urls with plain HTTP to find the new ITF player ID (P8618)
+
+# Imports
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+# Legacy profile url of the ITF, the old ITF player ID (P599) is appended
+itf_legacy_url = "https://www.itftennis.com/procircuit/players/player/profile.aspx?playerid="
+
+
+def slugFromURL(url):
+    # Function that returns the new ITF ID from a resolved url in the same format as the Selenium based bot, None if
+    # the url is no player profile
+    # e.g. https://www.itftennis.com/en/players/jimmy-brown/800177644/usa/mt/s/overview/ -> jimmy-brown/800177644/usa
+    parts = urlparse(url).path.strip("/").split("/")
+    if "players" not in parts:
+        return None
+    slug = parts[parts.index("players") + 1:][:3]
+    if len(slug) < 3 or not slug[1].isdigit():
+        return None
+    return "/".join(slug)
+
+
+def legacyID(itf_old):
+    # Function that returns the marker stored for an old ITF ID that was not resolved, "aspx?" marks it as failed
+    return "profile.aspx?playerid=" + itf_old
+
+
+class Hostlimiter(object):
+    # Object that spaces requests to the same host by a minimum interval, shared by all worker threads
+    # Public methods: wait
+
+    def __init__(self, rate=5.0):
+        # Self method
+        # rate      = maximum number of requests per second and host
+        self.__interval = 1.0 / rate if rate else 0.0
+        self.__next = {}
+        self.__lock = threading.Lock()
+
+    def wait(self, url):
+        # Method that blocks until the next request to the host of url is allowed
+        host = urlparse(url).netloc
+        with self.__lock:
+            now = time.monotonic()
+            slot = max(now, self.__next.get(host, now))
+            self.__next[host] = slot + self.__interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Redirectresolver(object):
+    # Object that resolves legacy ITF profile urls concurrently with HEAD (or GET) requests and manual redirects
+    # Public methods: getBaseurl, getErrors, resolveURL, resolveID, resolveItems
+
+    def __init__(self, baseurl=itf_legacy_url, workers=8, rate=5.0, timeout=30, maxredirects=10):
+        # Self method
+        # baseurl   = legacy profile url the old ITF ID is appended to, can point to a local stand-in server
+        # workers   = number of concurrent requests
+        # rate      = maximum number of requests per second and host
+        # timeout   = timeout of a single request in seconds
+        self.__baseurl = baseurl
+        self.__workers = workers
+        self.__timeout = timeout
+        self.__maxredirects = maxredirects
+        self.__limiter = Hostlimiter(rate)
+        self.__local = threading.local()
+        self.__errors = 0
+        self.__lock = threading.Lock()
+        self.__useragent = "wikitennisbot/0.1 (https://wikitennisbot.toolforge.org)"
+
+    def getBaseurl(self):
+        # Method that returns the private baseurl as public
+        return self.__baseurl
+
+    def getErrors(self):
+        # Method that returns the number of items that failed with a request error or an unexpected url
+        return self.__errors
+
+    def resolveURL(self, url):
+        # Method that follows all redirects of url and returns the final url
+        session = self.__session()
+        for i in range(self.__maxredirects):
+            self.__limiter.wait(url)
+            response = session.head(url, allow_redirects=False, timeout=self.__timeout)
+            if response.status_code in (405, 501):
+                response = session.get(url, allow_redirects=False, timeout=self.__timeout, stream=True)
+                response.close()
+            if not response.is_redirect:
+                return url
+            url = urljoin(url, response.headers["Location"])
+        return url
+
+    def resolveID(self, itf_old):
+        # Method that returns the new ITF ID for an old ITF ID, contains "aspx?" if the old ID is not redirected
+        # Redirects to any other page, e.g. the start page, are counted as errors and kept as unresolved
+        url = self.resolveURL(self.__baseurl + itf_old)
+        slug = slugFromURL(url)
+        if slug is not None:
+            return slug
+        if url != self.__baseurl + itf_old:
+            self.__error(itf_old + " - redirected to " + url)
+        return legacyID(itf_old)
+
+    def resolveItems(self, items, callback=None):
+        # Method that adds itf_new to every item of a dictionary {key: {"itf_old": ..., ...}} and returns it
+        # Failed requests keep the legacy url format, so they are treated as errors like unresolved IDs
+        # callback  = optional function(key, item) called as soon as an item is resolved, e.g. to write a checkpoint,
+        #             items are handed over in the order they finish, so a slow item holds back no other
+        keys = list(items)
+        done = [0]
+        lock = threading.Lock()
+
+        def resolve(key):
+            try:
+                itf_new = self.resolveID(items[key]["itf_old"])
+            except requests.RequestException as e:
+                self.__error(str(key) + " - " + repr(e))
+                itf_new = legacyID(items[key]["itf_old"])
+            with lock:
+                done[0] += 1
+                # Print progress to console
+                print(str(done[0]) + "/" + str(len(keys)))
+            return itf_new
+
+        with ThreadPoolExecutor(max_workers=self.__workers) as pool:
+            futures = {pool.submit(resolve, key): key for key in keys}
+            for future in as_completed(futures):
+                key = futures[future]
+                items[key]["itf_new"] = future.result()
+                if callback is not None:
+                    callback(key, items[key])
+        return items
+
+    def __error(self, message):
+        # Method that prints a failed item and counts it
+        print(message)
+        with self.__lock:
+            self.__errors += 1
+
+    def __session(self):
+        # Method that returns the keep-alive session of the current worker thread
+        if not hasattr(self.__local, "session"):
+            self.__local.session = requests.Session()
+            self.__local.session.headers["User-Agent"] = self.__useragent
+        return self.__local.session
+
+
+    # Access of private variables
+    baseurl = property(getBaseurl)
+    errors = property(getErrors)
+
+
+# Testing environment
+if __name__ == '__main__':
+    print(slugFromURL("https://www.itftennis.com/en/players/jimmy-brown/800177644/usa/mt/s/overview/"),
+          slugFromURL("https://www.itftennis.com/en/"), slugFromURL(itf_legacy_url + "10000183"))
+    resolver = Redirectresolver()
+    print(resolver.resolveID("10000183"))
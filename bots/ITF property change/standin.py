@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# Name:     ITF stand-in server
+# Author:   Mad_melone (https://w.wiki/gDR)
+# Date:     18-10-2026
+# Content:  Local HTTP server that answers legacy ITF profile urls with redirects, to test the redirect resolver offline
+
+# Imports
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def loadRedirects(path):
+    # Function that returns {itf_old: itf_new} from an items file of the bot
+    with open(path) as item_file:
+        item_data = json.load(item_file)
+    return {item["itf_old"]: item["itf_new"] for item in item_data.values() if "aspx?" not in item["itf_new"]}
+
+
+def createHandler(redirects):
+    # Function that returns a request handler redirecting known legacy IDs like itftennis.com does
+    class Standinhandler(BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            url = urlparse(self.path)
+            playerid = parse_qs(url.query).get("playerid", [""])[0]
+            if url.path.endswith("profile.aspx") and playerid in redirects:
+                self.send_response(301)
+                self.send_header("Location", "/en/players/" + redirects[playerid] + "/mt/s/overview/")
+            else:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            self.do_HEAD()
+
+        def log_message(self, format, *args):
+            pass
+
+    return Standinhandler
+
+
+# Start server, e.g. python standin.py items_backupnoerrors2.txt --port 8599 and run the resolver with
+# baseurl = "http://localhost:8599/procircuit/players/player/profile.aspx?playerid="
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local stand-in for legacy ITF profile redirects")
+    parser.add_argument("items", help="items file with itf_old and itf_new")
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("localhost", args.port), createHandler(loadRedirects(args.items)))
+    print("Serving " + args.items + " on http://localhost:" + str(args.port))
+    server.serve_forever()